@@ -4,14 +4,128 @@ Will You Be Frankenstien? - Super Mario Style Edition
 WEB DEPLOYMENT READY - All async fixes applied
 """
 
+import time
+STARTUP_T0 = time.perf_counter()  # before the heavy imports, so they count towards startup
+
 import pygame
 import sys
 import os
 import math
 import random
 import asyncio  # REQUIRED FOR WEB
+import csv
+import io
+import json
+import hashlib
+import statistics
+import struct
+import weakref
+from array import array
+from collections import OrderedDict, deque
+
+# Optional: NumPy vectorizes particle updates; the stdlib array fallback keeps the same layout.
+# Its import costs more than the rest of startup, so it waits for the first ParticleSystem.
+np = None
+_numpy_checked = False
+
+def load_numpy():
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np
+
+# Optional: the audio pack is memory-mapped where mmap exists, read into memory otherwise
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
+# ------------------------- STARTUP -------------------------
+# Import-to-first-frame breakdown, printed with the first frame
+STARTUP_STEPS = []
+_startup_mark = STARTUP_T0
+
+def startup_step(label):
+    """Record the time since the previous step under label"""
+    global _startup_mark
+    now = time.perf_counter()
+    STARTUP_STEPS.append((label, (now - _startup_mark) * 1000))
+    _startup_mark = now
+
+def startup_report():
+    steps = ", ".join(f"{label} {ms:.1f}" for label, ms in STARTUP_STEPS)
+    return f"First frame {(_startup_mark - STARTUP_T0) * 1000:.1f} ms after startup ({steps})"
+
+startup_step("imports")
+
+# ------------------------- AUDIO PACK -------------------------
+# Built by tools/build_audio_pack.py; the loose WAVs in assets/sfx are the fallback
+AUDIO_PACK_PATH = os.path.join("assets", "audio.pack")
+
+class AudioPack:
+    """Indexed mono PCM bundle; pcm(name) returns a zero-copy memoryview slice"""
+
+    MAGIC = b"FRPK"
+    VERSION = 1
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            try:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (AttributeError, OSError, ValueError):
+                self._buffer = f.read()
+        self.view = memoryview(self._buffer)
+        if bytes(self.view[:4]) != self.MAGIC:
+            raise ValueError(f"{path}: not an audio pack")
+        version, header_len = struct.unpack_from("<II", self.view, 4)
+        if version != self.VERSION:
+            raise ValueError(f"{path}: pack version {version}, expected {self.VERSION}")
+        header = json.loads(bytes(self.view[12:12 + header_len]))
+        self.rate = header["rate"]
+        self.channels = header["channels"]
+        self.width = header["width"]
+        self.entries = header["entries"]
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def size(self, name):
+        return self.entries[name]["length"]
+
+    def pcm(self, name):
+        entry = self.entries[name]
+        return self.view[entry["offset"]:entry["offset"] + entry["length"]]
+
+    def wav_bytes(self, name):
+        """The entry wrapped in a RIFF header, for mixers running another format"""
+        pcm = self.pcm(name)
+        block = self.channels * self.width
+        header = struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + len(pcm), b"WAVE", b"fmt ", 16, 1,
+                             self.channels, self.rate, self.rate * block, block, 8 * self.width,
+                             b"data", len(pcm))
+        return header + pcm.tobytes()
+
+def open_audio_pack(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        return AudioPack(path)
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"Audio pack ignored: {exc}")
+        return None
+
+AUDIO_PACK = open_audio_pack(AUDIO_PACK_PATH)
+startup_step("audio pack")
 
 # ------------------------- INIT -------------------------
+if AUDIO_PACK:
+    # Run the mixer in the pack's own format so entries play without conversion
+    pygame.mixer.pre_init(AUDIO_PACK.rate, -8 * AUDIO_PACK.width, AUDIO_PACK.channels, allowedchanges=0)
 pygame.init()
 
 # Safe audio init
@@ -22,15 +136,41 @@ except pygame.error:
     sound_enabled = False
     print("âš ï¸ Audio disabled")
 
+startup_step("pygame.init")
+
 WIDTH, HEIGHT = 1000, 650
 SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+DISPLAY = SCREEN  # the window surface; SCREEN becomes a ScaledScreen at reduced render scale
 pygame.display.set_caption("Will You Be Frankenstien? ðŸŽ®ðŸ’•")
-CLOCK = pygame.time.Clock()
-
-FONT_BIG = pygame.font.SysFont("arial", 52, bold=True)
-FONT_MED = pygame.font.SysFont("arial", 34)
-FONT_SMALL = pygame.font.SysFont("arial", 26)
-FONT_TINY = pygame.font.SysFont("arial", 20)
+startup_step("display")
+
+# Bundled TTF instead of SysFont: no system font enumeration at startup, and
+# the same glyphs on every platform. Sizes match what SysFont("arial", 52/34/
+# 26/20) rendered wherever Arial is missing (always on the web): pygame's
+# default face, which it scales by 0.6875.
+FONT_PATH = os.path.join("assets", "fonts", "FreeSansBold.ttf")
+
+class LazyFont:
+    """pygame.font.Font from FONT_PATH, opened on first use"""
+
+    def __init__(self, size, bold=False):
+        self._size = size
+        self._bold = bold
+        self._font = None
+
+    def __getattr__(self, name):
+        if self._font is None:
+            try:
+                self._font = pygame.font.Font(FONT_PATH, self._size)
+            except OSError:  # missing bundle: pygame's own copy of the face, drawn a little smaller
+                self._font = pygame.font.Font(None, self._size)
+            self._font.set_bold(self._bold)
+        return getattr(self._font, name)
+
+FONT_BIG = LazyFont(35, bold=True)
+FONT_MED = LazyFont(23)
+FONT_SMALL = LazyFont(17)
+FONT_TINY = LazyFont(13)
 
 # Colors
 MARIO_RED = (240, 20, 20)
@@ -54,41 +194,1232 @@ BLUE_SKY = (100, 150, 255)
 WOOD_DARK = (80, 50, 20)
 WOOD_LIGHT = (140, 90, 40)
 
-# ------------------------- SOUND -------------------------
-def load_sound(name):
-    if not sound_enabled:
-        return None
-    path = os.path.join("assets", "sfx", name)
-    if not os.path.exists(path):
-        return None
-    try:
-        return pygame.mixer.Sound(path)
-    except pygame.error:
-        return None
+# ------------------------- TEXT -------------------------
+class TextCache:
+    """Bounded LRU cache of rendered text keyed by (font, text, antialias, color)"""
+
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, antialias, color):
+        key = (font, text, antialias, color)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.capacity:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self._surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {"size": len(self._surfaces), "capacity": self.capacity,
+                "hits": self.hits, "misses": self.misses}
+
+TEXT_CACHE = TextCache()
+
+def render_text(font, text, antialias, color):
+    """Drop-in for font.render() that reuses surfaces for unchanged strings"""
+    return TEXT_CACHE.render(font, text, antialias, color)
+
+# ------------------------- PROFILER -------------------------
+class _NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
 
-def play_sound(snd):
-    if snd and sound_enabled:
-        snd.play()
+_NULL_SECTION = _NullSection()
 
-def start_music():
-    if not sound_enabled:
-        return
-    path = os.path.join("assets", "sfx", "mario_theme.wav")
-    if os.path.exists(path):
+class _ProfileSection:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        current = self.profiler.current
+        if current is not None:
+            sections = current["sections"]
+            sections[self.name] = sections.get(self.name, 0.0) + (time.perf_counter() - self.start) * 1000
+        return False
+
+class FrameProfiler:
+    """Per-frame phase timings (events/update/draw/present) kept in a ring buffer.
+
+    Scene loops call begin_frame() after the clock tick and lap(phase) when a
+    phase ends; DirtyRects.present() closes the draw and present phases.
+    Helpers tag their own cost with `with PROFILER.section(name):`. While
+    disabled every call returns immediately.
+
+    F3 toggles recording plus the on-screen overlay, F4 exports the buffer
+    as CSV and JSON. FRANK_PROFILE=1 records from startup without the overlay.
+    """
+
+    PHASES = ("events", "update", "draw", "present")
+    OVERLAY_REFRESH_MS = 500
+
+    def __init__(self, capacity=600, enabled=False):
+        self.enabled = enabled
+        self.recording_by_default = enabled
+        self.show_overlay = False
+        self.records = deque(maxlen=capacity)
+        self.frame_index = 0
+        self.current = None
+        self._start = 0.0
+        self._mark = 0.0
+        self._overlay = None
+        self._overlay_time = 0
+
+    def begin_frame(self, scene):
+        if not self.enabled:
+            return
+        self.current = {"frame": self.frame_index, "scene": scene, "sections": {}}
+        self._start = self._mark = time.perf_counter()
+
+    def lap(self, phase):
+        if self.current is None:
+            return
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0.0) + (now - self._mark) * 1000
+        self._mark = now
+
+    def section(self, name):
+        if self.current is None:
+            return _NULL_SECTION
+        return _ProfileSection(self, name)
+
+    def end_frame(self):
+        if self.current is None:
+            return
+        self.lap("present")
+        self.current["total"] = (time.perf_counter() - self._start) * 1000
+        self.records.append(self.current)
+        self.frame_index += 1
+        self.current = None
+
+    def handle_event(self, event):
+        if event.type != pygame.KEYDOWN:
+            return
+        if event.key == pygame.K_F3:
+            self.show_overlay = not self.show_overlay
+            self.enabled = self.show_overlay or self.recording_by_default
+            self._overlay = None
+            DIRTY.invalidate()
+        elif event.key == pygame.K_F4:
+            self.export()
+
+    def summary(self, last=60):
+        """Mean milliseconds per phase and section over the last frames"""
+        recent = list(self.records)[-last:]
+        if not recent:
+            return {}
+        totals = {}
+        for rec in recent:
+            for key in self.PHASES + ("total",):
+                totals[key] = totals.get(key, 0.0) + rec.get(key, 0.0)
+            for key, ms in rec["sections"].items():
+                totals[key] = totals.get(key, 0.0) + ms
+        return {key: ms / len(recent) for key, ms in totals.items()}
+
+    def draw_overlay(self, surf):
+        if not self.show_overlay:
+            return None
+        now = pygame.time.get_ticks()
+        if self._overlay is None or now - self._overlay_time >= self.OVERLAY_REFRESH_MS:
+            self._overlay_time = now
+            # Numbers change every refresh, so render directly instead of churning TEXT_CACHE
+            lines = [f"{key:<22}{ms:7.2f} ms" for key, ms in self.summary().items()] or ["collecting..."]
+            clock = CLOCK.stats()
+            lines += [f"{'clock fps':<22}{clock['fps']:7.2f}",
+                      f"{'clock drift':<22}{clock['drift_ms']:7.2f} ms",
+                      f"{'clock jitter':<22}{clock['jitter_ms']:7.2f} ms"]
+            rendered = [FONT_TINY.render(line, True, WHITE) for line in lines]
+            width = max(r.get_width() for r in rendered) + 16
+            height = sum(r.get_height() for r in rendered) + 12
+            self._overlay = pygame.Surface((width, height))
+            self._overlay.fill(BLACK)
+            y = 6
+            for r in rendered:
+                self._overlay.blit(r, (8, y))
+                y += r.get_height()
+        return surf.blit(self._overlay, (surf.get_width() - self._overlay.get_width() - 10, 10))
+
+    def export(self, basename="frame_profile"):
+        """Write the ring buffer as <basename>.csv and <basename>.json"""
+        records = list(self.records)
+        sections = sorted({name for rec in records for name in rec["sections"]})
+        columns = ["frame", "scene", *self.PHASES, "total", *sections]
+        with open(basename + ".csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for rec in records:
+                row = {**rec, **rec["sections"]}
+                writer.writerow([row.get(c, "") if c in ("frame", "scene") else round(row.get(c, 0.0), 3)
+                                 for c in columns])
+        with open(basename + ".json", "w") as f:
+            json.dump(records, f)
+        print(f"Frame profile: {len(records)} frames -> {basename}.csv / {basename}.json")
+        if sys.platform == "emscripten":
+            # pygbag: files live in the browser's in-memory FS, so hand them to the page
+            try:
+                import platform
+                platform.window.MM.download(basename + ".csv")
+                platform.window.MM.download(basename + ".json")
+            except Exception:
+                print(json.dumps(records))
+
+PROFILER = FrameProfiler(enabled=os.environ.get("FRANK_PROFILE", "0") == "1")
+
+# ------------------------- TIMING -------------------------
+# Simulation runs in fixed 60 Hz steps; rendering runs at whatever RENDER_FPS
+# the device manages. Per-step constants (MarioGirl.speed, gravity, ...) are
+# tuned for SIM_HZ.
+SIM_HZ = 60
+SIM_DT = 1 / SIM_HZ
+MAX_SIM_STEPS = 5
+RENDER_FPS = int(os.environ.get("FRANK_FPS", "60"))
+
+class FixedStep:
+    """Accumulator that turns variable frame times into whole simulation steps"""
+
+    def __init__(self, dt=SIM_DT, max_steps=MAX_SIM_STEPS):
+        self.dt = dt
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self._discard_next = False
+
+    def advance(self, frame_seconds):
+        """Return how many steps to simulate for a frame that took frame_seconds"""
+        if self._discard_next:
+            self._discard_next = False
+            return 0
+        self.accumulator += frame_seconds
+        steps = int(self.accumulator / self.dt + 1e-6)
+        if steps > self.max_steps:
+            # Too far behind to catch up: run the cap and drop the backlog
+            self.accumulator = 0.0
+            return self.max_steps
+        self.accumulator = max(0.0, self.accumulator - steps * self.dt)
+        return steps
+
+    def resync(self):
+        """Forget pending time, including the next frame's (after a blocking cutscene)"""
+        self.accumulator = 0.0
+        self._discard_next = True
+
+    @property
+    def alpha(self):
+        """How far rendering is between the last two simulation steps (0..1)"""
+        return min(1.0, self.accumulator / self.dt)
+
+class FrameClock:
+    """Frame scheduler that awaits the next frame instead of blocking in Clock.tick.
+
+    `frame_ms = await CLOCK.tick(fps)` sleeps with asyncio.sleep() until the
+    frame deadline, so the asset loader and any other task run in the spare
+    time, on desktop and in the browser alike. Deadlines advance by whole
+    periods, so late wake-ups do not add up; falling more than a period
+    behind restarts the schedule instead of rushing to catch up. drift is
+    how late each wake-up was, jitter the spread of frame intervals.
+    """
+
+    def __init__(self, window=120):
+        self.intervals = deque(maxlen=window)
+        self.drifts = deque(maxlen=window)
+        self._last = None       # when the previous tick returned
+        self._deadline = None
+        self._rawtime = 0.0
+
+    async def tick(self, framerate=0):
+        """Wait for the next frame at framerate (0: just yield); returns ms since the previous tick"""
+        now = time.perf_counter()
+        last = now if self._last is None else self._last
+        self._rawtime = (now - last) * 1000
+        deadline = None
+        if framerate > 0:
+            period = 1 / framerate
+            deadline = (self._deadline or last) + period
+            if deadline < now - period:
+                deadline = now
+        await asyncio.sleep(max(0.0, deadline - now) if deadline is not None else 0)
+        woke = time.perf_counter()
+        if deadline is not None:
+            self.drifts.append((woke - deadline) * 1000)
+        self._deadline = deadline
+        elapsed = (woke - last) * 1000
+        if self._last is not None:
+            self.intervals.append(elapsed)
+        self._last = woke
+        return elapsed
+
+    def get_time(self):
+        return self.intervals[-1] if self.intervals else 0.0
+
+    def get_rawtime(self):
+        """Work time of the last frame: from the previous tick returning to this one starting"""
+        return self._rawtime
+
+    def get_fps(self):
+        return 1000 / statistics.fmean(self.intervals) if self.intervals else 0.0
+
+    def stats(self):
+        """Frame rate, mean and worst drift and jitter (ms) over the recent window"""
+        drifts = self.drifts or (0.0,)
+        return {
+            "fps": self.get_fps(),
+            "drift_ms": statistics.fmean(drifts),
+            "drift_max_ms": max(drifts),
+            "jitter_ms": statistics.pstdev(self.intervals) if self.intervals else 0.0,
+        }
+
+CLOCK = FrameClock()
+
+# Screens that sit unchanged (menus, the click-to-start wait) skip drawing and
+# presenting, and tick at IDLE_FPS once nothing has happened for a while.
+# FRANK_IDLE_FRAMES=0 draws every frame (tools/export_frames.py uses it).
+IDLE_FPS = 15
+IDLE_FRAMES = os.environ.get("FRANK_IDLE_FRAMES", "1") != "0"
+
+class FramePacer:
+    """Draw/skip decision and tick rate for a mostly static screen.
+
+    Each frame the scene says whether anything visible changed; frame()
+    returns whether to draw and present. After settle_ms without a change,
+    input or other activity the loop should tick at IDLE_FPS (fps); any of
+    them brings it straight back to RENDER_FPS. Ticks stay on CLOCK rather
+    than pygame.event.wait, which would block the browser's event loop.
+    """
+
+    def __init__(self, settle_ms=500):
+        self.settle_ms = settle_ms
+        self.quiet_ms = 0
+        self.skipped = 0
+
+    @property
+    def idle(self):
+        return self.quiet_ms >= self.settle_ms
+
+    @property
+    def fps(self):
+        return IDLE_FPS if self.idle else RENDER_FPS
+
+    @property
+    def idle_budget_ms(self):
+        """run_idle() budget: idle ticks hand background work the frames they skip"""
+        return IDLE_MS * RENDER_FPS / IDLE_FPS if self.idle else IDLE_MS
+
+    def frame(self, frame_ms, changed, active=False):
+        if changed or active or INPUT.active:
+            self.quiet_ms = 0
+        else:
+            self.quiet_ms += frame_ms
+        if changed or not IDLE_FRAMES:
+            return True
+        self.skipped += 1
+        QUALITY.observe(CLOCK.get_rawtime())  # present() does this for drawn frames
+        return False
+
+# ------------------------- PRESENT -------------------------
+class ScaledScreen:
+    """Offscreen render target at scale x the window size, drawn in window coordinates.
+
+    Covers the part of the Surface API scenes use on SCREEN (blit, blits,
+    fill, get_size, get_rect, get_width, get_height): positions and rects
+    are scaled on the way in, returned rects are mapped back, and every
+    source is downscaled once and cached for as long as it is alive, so
+    sources must not be repainted after their first blit. Layout, hit tests
+    and input all stay in window coordinates; present() scales the frame up
+    into the window.
+    """
+
+    def __init__(self, window, scale):
+        self.scale = scale
+        self.size = window.get_size()
+        self.surface = pygame.Surface((round(self.size[0] * scale), round(self.size[1] * scale)), 0, window)
+        self._sources = weakref.WeakKeyDictionary()
+
+    def get_size(self):
+        return self.size
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def get_rect(self, **kwargs):
+        rect = pygame.Rect((0, 0), self.size)
+        for name, value in kwargs.items():
+            setattr(rect, name, value)
+        return rect
+
+    def scaled(self, source):
+        """source at render scale; palettes and colorkeys scale nearest-neighbour, not blended"""
+        small = self._sources.get(source)
+        if small is None:
+            w, h = source.get_size()
+            size = (max(1, round(w * self.scale)), max(1, round(h * self.scale)))
+            smooth = source.get_bitsize() >= 24 and source.get_colorkey() is None
+            small = (pygame.transform.smoothscale if smooth else pygame.transform.scale)(source, size)
+            self._sources[source] = small
+        return small
+
+    def to_render(self, rect):
+        """Window-space rect -> the render pixels it covers (never empty for a non-empty rect)"""
+        x, y, w, h = pygame.Rect(rect)
+        s = self.scale
+        left, top = math.floor(x * s), math.floor(y * s)
+        return pygame.Rect(left, top, math.ceil((x + w) * s) - left, math.ceil((y + h) * s) - top)
+
+    def to_window(self, rect):
+        x, y, w, h = rect
+        s = self.scale
+        left, top = math.floor(x / s), math.floor(y / s)
+        return pygame.Rect(left, top, math.ceil((x + w) / s) - left, math.ceil((y + h) / s) - top)
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        s = self.scale
+        if area is not None:
+            area = self.to_render(area)
+        rect = self.surface.blit(self.scaled(source), (math.floor(dest[0] * s), math.floor(dest[1] * s)),
+                                 area, special_flags)
+        return self.to_window(rect)
+
+    def blits(self, blit_sequence, doreturn=True):
+        s = self.scale
+        scaled = self.scaled
+        rects = self.surface.blits([(scaled(source), (math.floor(dest[0] * s), math.floor(dest[1] * s)))
+                                    for source, dest in blit_sequence], doreturn)
+        return [self.to_window(r) for r in rects] if doreturn else None
+
+    def fill(self, color, rect=None, special_flags=0):
+        if rect is not None:
+            rect = self.to_render(rect)
+        return self.to_window(self.surface.fill(color, rect, special_flags))
+
+def render_surface():
+    """The Surface drawing lands on: the window, or the offscreen target at reduced scale"""
+    return SCREEN.surface if SCREEN is not DISPLAY else SCREEN
+
+def set_render_scale(scale):
+    """Draw at scale x the window size from the next frame on; the window itself never changes"""
+    global SCREEN
+    SCREEN = DISPLAY if scale == 1 else ScaledScreen(DISPLAY, scale)
+    DIRTY.invalidate()
+
+def fill_rounded(surf, color, rect, radius):
+    """pygame.draw.rect with rounded corners, on SCREEN at any render scale"""
+    if isinstance(surf, ScaledScreen):
+        surf, rect, radius = surf.surface, surf.to_render(rect), max(1, round(radius * surf.scale))
+    return pygame.draw.rect(surf, color, rect, 0, radius)
+
+# Opt-in retained rendering: FRANK_RETAINED=1 pushes only changed regions to the display
+RETAINED_RENDERING = os.environ.get("FRANK_RETAINED", "0") == "1"
+
+class DirtyRects:
+    """Collects the screen regions changed this frame and presents only those.
+
+    Widgets report what they changed from their draw() methods. Scenes call
+    invalidate() when the whole frame changes (scene entry, room change, full
+    screen animation). If the dirty area exceeds full_ratio of the screen the
+    frame falls back to a plain flip.
+    """
+
+    def __init__(self, enabled, full_ratio=0.5):
+        self.enabled = enabled
+        self.full_ratio = full_ratio
+        self.full = True
+        self.rects = []
+
+    def add(self, rect):
+        if self.enabled and not self.full and rect:
+            self.rects.append(pygame.Rect(rect))
+
+    def invalidate(self):
+        self.full = True
+        self.rects.clear()
+
+    def redraw_all(self):
+        """True when the scene must repaint everything instead of just changed widgets"""
+        return not self.enabled or self.full
+
+    def present(self):
+        PROFILER.lap("draw")
+        if SCREEN is not DISPLAY:
+            # Reduced render scale: one upscale fills the window, the overlay stays sharp on top
+            pygame.transform.scale(SCREEN.surface, DISPLAY.get_size(), DISPLAY)
+            PROFILER.draw_overlay(DISPLAY)
+            pygame.display.flip()
+        else:
+            self.add(PROFILER.draw_overlay(SCREEN))
+            if self.redraw_all():
+                pygame.display.flip()
+            elif self.rects:
+                bounds = SCREEN.get_rect()
+                rects = [r.clip(bounds) for r in self.rects]
+                area = sum(r.w * r.h for r in rects)
+                if area > self.full_ratio * bounds.w * bounds.h:
+                    pygame.display.flip()
+                else:
+                    pygame.display.update(rects)
+        self.rects.clear()
+        self.full = False
+        PROFILER.end_frame()
+        QUALITY.observe(CLOCK.get_rawtime())
+
+DIRTY = DirtyRects(RETAINED_RENDERING)
+
+# ------------------------- QUALITY -------------------------
+# FRANK_QUALITY=auto adapts at runtime; 0, 1 or 2 pins a level
+QUALITY_SETTING = os.environ.get("FRANK_QUALITY", "auto")
+
+class QualityController:
+    """Trades detail for frame time when the frame budget is missed for a while.
+
+    Levels are (render scale, glow layers, particle share), best first; a
+    scale below 1 draws into a smaller ScaledScreen that present() scales up
+    into the unchanged window. observe() collects per-frame work time
+    (CLOCK.get_rawtime(), i.e. without the tick's sleep) from present() and
+    from the frames idle screens skip, so those can raise the level too.
+    Every window frames the median is checked: above drop_ratio of the
+    budget drops a level at once; below raise_ratio for `recover` windows
+    in a row raises one. The gap between the two ratios and the longer
+    recovery time form the hysteresis, and every drop doubles the recovery
+    time so a level that cannot hold is not retried every few seconds. The
+    median ignores one-off stalls such as cutscene holds.
+    """
+
+    LEVELS = ((1.0, 3, 1.0), (1.0, 1, 0.5), (0.5, 0, 0.25))
+
+    def __init__(self, budget_ms, window=30, drop_ratio=0.9, raise_ratio=0.5, recover=4):
+        self.budget_ms = budget_ms
+        self.window = window
+        self.drop_ratio = drop_ratio
+        self.raise_ratio = raise_ratio
+        self.recover = recover
+        self.level = 0
+        self.pinned = False
+        self.changes = 0
+        self._samples = []
+        self._calm = 0
+
+    @property
+    def render_scale(self):
+        return self.LEVELS[self.level][0]
+
+    @property
+    def glow_layers(self):
+        return self.LEVELS[self.level][1]
+
+    @property
+    def particle_share(self):
+        return self.LEVELS[self.level][2]
+
+    def pin(self, level):
+        """Hold one level (None resumes adapting)"""
+        self.pinned = level is not None
+        self.set_level(level or 0)
+
+    def set_level(self, level):
+        level = max(0, min(level, len(self.LEVELS) - 1))
+        if level == self.level:
+            return
+        old_scale = self.render_scale
+        self.level = level
+        self.changes += 1
+        self._samples.clear()
+        self._calm = 0
+        if self.render_scale != old_scale:
+            set_render_scale(self.render_scale)
+        DIRTY.invalidate()
+
+    def observe(self, work_ms):
+        if self.pinned:
+            return
+        self._samples.append(work_ms)
+        if len(self._samples) < self.window:
+            return
+        self._samples.sort()
+        median = self._samples[len(self._samples) // 2]
+        self._samples.clear()
+        if median > self.drop_ratio * self.budget_ms and self.level < len(self.LEVELS) - 1:
+            self.recover = min(self.recover * 2, 32)
+            self.set_level(self.level + 1)
+        elif median < self.raise_ratio * self.budget_ms and self.level > 0:
+            self._calm += 1
+            if self._calm >= self.recover:
+                self.set_level(self.level - 1)
+        else:
+            self._calm = 0
+
+QUALITY = QualityController(1000 / RENDER_FPS)
+if QUALITY_SETTING != "auto":
+    QUALITY.pin(int(QUALITY_SETTING))
+
+# ------------------------- SPRITES -------------------------
+# Anything drawn from primitives whose look depends only on a few discrete
+# inputs is painted once per key into a convert_alpha() sprite, then blitted.
+_sprites = {}
+
+# Built by tools/bake_atlas.py: the static sprites and background chunks packed
+# into one PNG, with a JSON index of rects keyed by repr(key). A key found
+# there is a subsurface of the sheet; anything else is painted as before.
+ATLAS_PATH = os.path.join("assets", "atlas.png")
+ATLAS_INDEX_PATH = os.path.join("assets", "atlas.json")
+
+def source_stamp():
+    """SHA-256 of this file; an atlas baked from other painters is stale"""
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class SpriteAtlas:
+    """Pre-baked sprite sheet, loaded on the first lookup; get(key) returns a subsurface or None"""
+
+    VERSION = 1
+
+    def __init__(self, image_path, index_path):
+        self.image_path = image_path
+        self.index_path = index_path
+        self.sheet = None
+        self.rects = None  # None until loaded; {} when there is no usable atlas
+
+    def load(self):
+        self.rects = {}
+        if not os.path.exists(self.index_path):
+            return
         try:
-            pygame.mixer.music.load(path)
-            pygame.mixer.music.set_volume(0.25)
-            pygame.mixer.music.play(-1)
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            if index["version"] != self.VERSION:
+                raise ValueError(f"version {index['version']}, expected {self.VERSION}")
+            if tuple(index["screen"]) != (WIDTH, HEIGHT):
+                raise ValueError(f"baked for a {index['screen']} screen")
+            if index["source"] != source_stamp():
+                raise ValueError("baked from another main.py, rerun tools/bake_atlas.py")
+            sheet = pygame.image.load(self.image_path).convert_alpha()
+        except (OSError, ValueError, KeyError, pygame.error) as exc:
+            print(f"Sprite atlas ignored: {exc}")
+            return
+        self.sheet = sheet
+        self.rects = index["rects"]
+
+    def get(self, key):
+        if self.rects is None:
+            self.load()
+        rect = self.rects.get(repr(key))
+        return self.sheet.subsurface(rect) if rect else None
+
+ATLAS = SpriteAtlas(ATLAS_PATH, ATLAS_INDEX_PATH)
+
+def baked_sprite(key, size, painter, *args):
+    """Return the sprite for key from the atlas, or call painter(surf, *args) on a transparent surface once"""
+    sprite = _sprites.get(key)
+    if sprite is None:
+        sprite = ATLAS.get(key)
+        if sprite is None:
+            sprite = pygame.Surface(size, pygame.SRCALPHA)
+            painter(sprite, *args)
+            sprite = sprite.convert_alpha()
+        _sprites[key] = sprite
+    return sprite
+
+def clear_sprite_cache():
+    _sprites.clear()
+
+# ------------------------- EFFECTS -------------------------
+# Full-screen lighting passes. Each mask is a brightness map computed once
+# with NumPy (one column for row-only masks, quarter size for the smooth
+# vignette), scaled to the screen, converted and cached per size. Every frame
+# it is applied with one SDL multiply blit, about 0.3 ms at 1000x650; the same
+# multiply done in NumPy over a pixels2d view of the frame costs 10x that
+# (tools/bench_effects.py).
+# Without NumPy the masked effects are skipped.
+_effect_masks = {}
+
+LAB_LAMP = (1.0, 0.55)      # lamp brightness at the top and bottom of the screen
+LAB_VIGNETTE = 0.6
+SCANLINE_DARKNESS = 0.3
+
+def vignette_shade(size, strength):
+    """Darken towards the corners by up to strength"""
+    dx = np.linspace(-1, 1, size[0] // 4, dtype=np.float32) ** 2
+    dy = np.linspace(-1, 1, size[1] // 4, dtype=np.float32) ** 2
+    r2 = (dx[:, None] + dy[None, :]) / 2
+    return 255 * (1 - strength * r2 * np.sqrt(r2)), True
+
+def gradient_shade(size, top, bottom):
+    """Vertical ramp from top to bottom brightness (0-1)"""
+    return np.linspace(255 * top, 255 * bottom, size[1], dtype=np.float32)[None, :], False
+
+def scanline_shade(size, darkness):
+    """Every other row darkened by darkness"""
+    rows = np.full((1, size[1]), 255, np.float32)
+    rows[:, ::2] = 255 * (1 - darkness)
+    return rows, False
+
+# kind -> shade(size, *args) returning (brightness array, smooth upscale?)
+EFFECT_SHADES = {"vignette": vignette_shade, "gradient": gradient_shade, "scanlines": scanline_shade}
+
+def effect_mask(kind, size, *args):
+    """Return the cached multiply mask for (kind, size, *args), or None without NumPy"""
+    key = (kind, size) + args
+    mask = _effect_masks.get(key)
+    if mask is None:
+        if load_numpy() is None:
+            return None
+        shade, smooth = EFFECT_SHADES[kind](size, *args)
+        gray = np.repeat(np.rint(shade).astype(np.uint8)[..., None], 3, axis=2)
+        scale = pygame.transform.smoothscale if smooth else pygame.transform.scale
+        mask = _effect_masks[key] = scale(pygame.surfarray.make_surface(gray).convert(), size)
+    return mask
+
+def apply_mask(surf, kind, *args):
+    if isinstance(surf, ScaledScreen):
+        surf = surf.surface  # masks are built at render size, so scanlines stay one pixel apart
+    mask = effect_mask(kind, surf.get_size(), *args)
+    if mask is not None:
+        surf.blit(mask, (0, 0), special_flags=pygame.BLEND_RGB_MULT)
+
+def apply_vignette(surf, strength=LAB_VIGNETTE):
+    apply_mask(surf, "vignette", strength)
+
+def apply_scanlines(surf, darkness=SCANLINE_DARKNESS):
+    apply_mask(surf, "scanlines", darkness)
+
+def flicker_level(t):
+    """Brightness (0-1) of a failing lamp t seconds in: a hum plus short dropouts"""
+    level = 0.9 + 0.06 * math.sin(t * 13.0) * math.sin(t * 7.3)
+    if math.sin(t * 2.3) * math.sin(t * 0.7) > 0.93:
+        level -= 0.35
+    return level
+
+def apply_lamp_light(surf, t):
+    """Ceiling lamp: light falls off towards the floor and flickers over time"""
+    apply_mask(surf, "gradient", *LAB_LAMP)
+    level = round(255 * flicker_level(t))
+    surf.fill((level, level, level), special_flags=pygame.BLEND_RGB_MULT)
+
+def apply_flash(surf, amount):
+    """Additive white flash; amount 0-1"""
+    level = round(255 * amount)
+    if level > 0:
+        surf.fill((level, level, level), special_flags=pygame.BLEND_RGB_ADD)
+
+def draw_lab_lighting(surf, t):
+    """Lamp flicker and vignette over a frame drawn in the Lab; changes every frame"""
+    with PROFILER.section("draw_lab_lighting"):
+        apply_lamp_light(surf, t)
+        apply_vignette(surf)
+    DIRTY.invalidate()
+
+def lab_lighting_tasks():
+    size = render_surface().get_size()
+    return {("mask", "gradient"): lambda: effect_mask("gradient", size, *LAB_LAMP),
+            ("mask", "vignette"): lambda: effect_mask("vignette", size, LAB_VIGNETTE)}
+
+# ------------------------- IDLE -------------------------
+# Spare time after each present() goes to prefetch tasks first, then clip baking
+IDLE_MS = 2.0
+
+class IdleQueue:
+    """FIFO of small callables run one at a time within an idle budget"""
+
+    def __init__(self):
+        self._tasks = OrderedDict()  # key -> task
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def add(self, task, key=None):
+        """Queue task unless one with the same key (default: the task itself) is waiting"""
+        self._tasks.setdefault(task if key is None else key, task)
+
+    def run(self, ms):
+        deadline = time.perf_counter() + ms / 1000
+        while self._tasks and time.perf_counter() < deadline:
+            self._tasks.popitem(last=False)[1]()
+
+IDLE = IdleQueue()
+
+def run_idle(ms=IDLE_MS):
+    start = time.perf_counter()
+    IDLE.run(ms)
+    remaining = ms - (time.perf_counter() - start) * 1000
+    if remaining > 0:
+        CLIPS.bake_idle(remaining)
+
+# ------------------------- CLIPS -------------------------
+# Deterministic cutscene sequences are baked into 8-bit palettized frames,
+# each cropped to what changed since the previous frame, and played back with
+# one blit per frame. Baking happens in small idle slices after present().
+CLIP_BUDGET_BYTES = 16 * 1024 * 1024
+
+def clip_palette(solids, ramps=(), steps=64):
+    """256-entry palette: solid colours first, then bg->fg blends for antialiased text"""
+    palette = list(solids)
+    for bg, fg in ramps:
+        for i in range(1, steps + 1):
+            palette.append(tuple(round(b + (f - b) * i / steps) for b, f in zip(bg, fg)))
+    if len(palette) > 256:
+        raise ValueError(f"clip palette needs {len(palette)} entries")
+    return palette + [palette[0]] * (256 - len(palette))
+
+def clip_text(font, text, color, background):
+    """Antialiased text as an 8-bit surface on an opaque background, for clip painters"""
+    return font.render(text, True, color, background)
+
+class Clip:
+    """Baked frames as (surface, position) pairs"""
+
+    def __init__(self):
+        self.frames = []
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def add(self, frame, pos):
+        self.frames.append((frame, pos))
+        self.nbytes += frame.get_width() * frame.get_height() + 4 * 256
+
+    def blit(self, surf, index):
+        frame, pos = self.frames[index]
+        return surf.blit(frame, pos)
+
+class _ClipJob:
+    def __init__(self, length, painter, palette, args, transparent):
+        self.clip = Clip()
+        self.length = length
+        self.painter = painter
+        self.palette = palette
+        self.args = args
+        self.transparent = transparent
+        self.last_rect = None
+        self.scratch = None  # allocated on the first baked frame, dropped after the last
+
+    @property
+    def done(self):
+        return len(self.clip) == self.length
+
+    def bake_next(self):
+        index = len(self.clip)
+        if self.scratch is None:
+            self.scratch = pygame.Surface(SCREEN.get_size(), 0, 8)
+            self.scratch.set_palette(self.palette)
+        self.scratch.fill(self.palette[0])
+        rect = self.painter(self.scratch, index, *self.args).clip(self.scratch.get_rect())
+        if index == 0 and not self.transparent:
+            crop = self.scratch.get_rect()  # opaque clips start from a full frame
+        else:
+            crop = rect.union(self.last_rect) if self.last_rect else rect
+        self.last_rect = rect
+        frame = self.scratch.subsurface(crop).copy()
+        if self.transparent:
+            frame.set_colorkey(self.palette[0])
+        self.clip.add(frame, crop.topleft)
+        if self.done:
+            self.scratch = None
+
+class ClipCache:
+    """LRU of baked clips within a byte budget.
+
+    painter(surf, index, *args) paints frame index onto a screen-sized 8-bit
+    surface pre-filled with palette[0] and returns the Rect it touched.
+    Transparent clips use palette[0] as their colorkey. request() queues a
+    clip for bake_idle(); clip() returns it complete, finishing any frames
+    idle time has not reached yet.
+    """
+
+    def __init__(self, budget=CLIP_BUDGET_BYTES):
+        self.budget = budget
+        self.used = 0
+        self.evicted = 0
+        self._clips = OrderedDict()
+        self._jobs = OrderedDict()
+
+    def request(self, key, length, painter, palette, *args, transparent=False):
+        if key not in self._clips and key not in self._jobs:
+            self._jobs[key] = _ClipJob(length, painter, palette, args, transparent)
+
+    def clip(self, key, length, painter, palette, *args, transparent=False):
+        clip = self._clips.get(key)
+        if clip is not None:
+            self._clips.move_to_end(key)
+            return clip
+        self.request(key, length, painter, palette, *args, transparent=transparent)
+        job = self._jobs[key]
+        while not job.done:
+            job.bake_next()
+        return self._finish(key)
+
+    def bake_idle(self, ms=IDLE_MS):
+        """Bake queued frames until ms have passed"""
+        deadline = time.perf_counter() + ms / 1000
+        while self._jobs and time.perf_counter() < deadline:
+            key, job = next(iter(self._jobs.items()))
+            job.bake_next()
+            if job.done:
+                self._finish(key)
+
+    def _finish(self, key):
+        clip = self._jobs.pop(key).clip
+        if clip.nbytes > self.budget:
+            return clip  # played once, never kept
+        while self._clips and self.used + clip.nbytes > self.budget:
+            _, old = self._clips.popitem(last=False)
+            self.used -= old.nbytes
+            self.evicted += 1
+        self._clips[key] = clip
+        self.used += clip.nbytes
+        return clip
+
+    def clear(self):
+        self._clips.clear()
+        self._jobs.clear()
+        self.used = 0
+
+    def stats(self):
+        return {"clips": len(self._clips), "queued": len(self._jobs), "bytes": self.used,
+                "budget": self.budget, "evicted": self.evicted}
+
+CLIPS = ClipCache()
+
+# ------------------------- COLLISION -------------------------
+COLLISION_CELL = 128  # px; MarioGirl (32x48) overlaps at most 4 cells
+
+class SpatialHash:
+    """Uniform-grid broadphase keyed by (room, cell x, cell y).
+
+    Entities are inserted once with their rect; query(room, rect) only visits
+    the cells rect overlaps, so the per-frame cost follows how crowded the
+    neighbourhood is rather than how many entities the level holds.
+    """
+
+    def __init__(self, cell=COLLISION_CELL):
+        self.cell = cell
+        self.cells = {}     # (room, cx, cy) -> {entity: rect}
+        self.entries = {}   # entity -> (room, rect, cell keys)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _keys(self, room, rect):
+        cell = self.cell
+        return [(room, cx, cy)
+                for cx in range(rect.left // cell, (rect.right - 1) // cell + 1)
+                for cy in range(rect.top // cell, (rect.bottom - 1) // cell + 1)]
+
+    def insert(self, entity, room, rect):
+        if entity in self.entries:
+            self.remove(entity)
+        rect = pygame.Rect(rect)
+        keys = self._keys(room, rect)
+        for key in keys:
+            self.cells.setdefault(key, {})[entity] = rect
+        self.entries[entity] = (room, rect, keys)
+
+    def remove(self, entity):
+        entry = self.entries.pop(entity, None)
+        if entry is None:
+            return
+        for key in entry[2]:
+            bucket = self.cells[key]
+            del bucket[entity]
+            if not bucket:
+                del self.cells[key]
+
+    def query(self, room, rect):
+        """Entities in room whose rect collides with rect, in insertion order per cell"""
+        hits = {}
+        cells = self.cells
+        for key in self._keys(room, rect):
+            bucket = cells.get(key)
+            if bucket:
+                for entity, other in bucket.items():
+                    if entity not in hits and rect.colliderect(other):
+                        hits[entity] = None
+        return list(hits)
+
+# ------------------------- ASSETS -------------------------
+ASSET_CHUNK_BYTES = 32 * 1024
+
+def decode_sound(data):
+    return pygame.mixer.Sound(file=io.BytesIO(data))
+
+def decode_packed(name):
+    if pygame.mixer.get_init() == (AUDIO_PACK.rate, -8 * AUDIO_PACK.width, AUDIO_PACK.channels):
+        return pygame.mixer.Sound(buffer=AUDIO_PACK.pcm(name))
+    return decode_sound(AUDIO_PACK.wav_bytes(name))
+
+ASSET_DECODERS = {"sound": decode_sound, "packed": decode_packed}
+
+class AssetManager:
+    """Manifest of named assets, loaded across frames as asyncio tasks.
+
+    Files are read in ASSET_CHUNK_BYTES pieces with a yield to the event loop
+    after each piece, so the click-to-start screen keeps drawing while they
+    load. get() returns None until an asset is ready (or if it failed);
+    `await wait(name)` lets a scene block on one asset.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.manifest = OrderedDict()   # name -> (kind, path or pack entry, size)
+        self.assets = {}
+        self.loaded_bytes = 0
+        self.total_bytes = 0
+        self._tasks = {}
+
+    def register(self, name, kind, filename):
+        path = os.path.join(self.root, filename)
+        if not os.path.exists(path):
+            return
+        size = os.path.getsize(path)
+        self.manifest[name] = (kind, path, size)
+        self.total_bytes += size
+
+    def register_packed(self, name, pack):
+        """Register an AudioPack entry; it decodes straight from the mapped pack"""
+        size = pack.size(name)
+        self.manifest[name] = ("packed", name, size)
+        self.total_bytes += size
+
+    def get(self, name):
+        return self.assets.get(name)
+
+    @property
+    def progress(self):
+        return self.loaded_bytes / self.total_bytes if self.total_bytes else 1.0
+
+    @property
+    def done(self):
+        return len(self.assets) == len(self.manifest)
+
+    async def _load(self, name):
+        kind, source, size = self.manifest[name]
+        if kind == "packed":
+            data = source
+            self.loaded_bytes += size
+            await asyncio.sleep(0)  # WEB SAFE
+        else:
+            data = bytearray()
+            with open(source, "rb") as f:
+                while True:
+                    chunk = f.read(ASSET_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    data += chunk
+                    self.loaded_bytes += len(chunk)
+                    await asyncio.sleep(0)  # WEB SAFE
+            data = bytes(data)
+        try:
+            self.assets[name] = ASSET_DECODERS[kind](data)
         except pygame.error:
-            pass
+            self.assets[name] = None
+
+    async def wait(self, name):
+        if name not in self.manifest:
+            return None
+        task = self._tasks.get(name)
+        if task is None:
+            task = self._tasks[name] = asyncio.ensure_future(self._load(name))
+        await task
+        return self.assets[name]
+
+    async def load_all(self):
+        for name in self.manifest:
+            await self.wait(name)
 
-SND_JUMP = load_sound("jump.wav")
-SND_COIN = load_sound("coin.wav")
-SND_PIPE = load_sound("pipe.wav")
-SND_STAGE_CLEAR = load_sound("stage_clear.wav")
-SND_POWERUP = load_sound("powerup.wav")
-SND_KISS = load_sound("kiss.wav")
-SND_LIGHTNING = load_sound("lightning.wav")
+    def start(self):
+        """Begin background loading; call from inside the running event loop"""
+        return asyncio.ensure_future(self.load_all())
+
+ASSETS = AssetManager(os.path.join("assets", "sfx"))
+
+# ------------------------- SOUND -------------------------
+SND_JUMP = "jump"
+SND_COIN = "coin"
+SND_PIPE = "pipe"
+SND_STAGE_CLEAR = "stage_clear"
+SND_POWERUP = "powerup"
+SND_KISS = "kiss"
+SND_LIGHTNING = "lightning"
+MUSIC_THEME = "mario_theme"
+
+# name -> (priority, max voices, cooldown ms); stings and cutscene cues
+# outrank the repeatable pickups and jumps
+SOUND_RULES = {
+    SND_JUMP: (1, 1, 120),
+    SND_COIN: (2, 2, 60),
+    SND_POWERUP: (2, 2, 80),
+    SND_PIPE: (3, 1, 250),
+    SND_STAGE_CLEAR: (4, 1, 500),
+    SND_KISS: (4, 1, 500),
+    SND_LIGHTNING: (4, 1, 500),
+}
+DEFAULT_SOUND_RULE = (1, 1, 100)
+
+SFX_VOICES = 4      # effect channels; the mixer gets exactly these plus the music channel
+MUSIC_CHANNEL = 0
+
+class AudioManager:
+    """Fixed voice pool for effects plus one music channel.
+
+    Every channel is reserved, so pygame never picks one on its own. A sound
+    retriggered within its cooldown is coalesced into the voice already
+    playing. When a sound is at its voice limit its oldest voice restarts;
+    when the pool is full the oldest voice of the lowest priority at or
+    below the new sound's is stolen, otherwise the new sound is dropped.
+    Cooldowns run on pygame.time.get_ticks().
+    """
+
+    def __init__(self, voices, enabled):
+        self.enabled = enabled
+        self.voices = []
+        self.playing = []     # per voice: (name, priority, start tick) or None
+        self.last_played = {}
+        self.counts = {"played": 0, "coalesced": 0, "stolen": 0, "dropped": 0}
+        self.music = None
+        if enabled:
+            pygame.mixer.set_num_channels(voices + 1)
+            pygame.mixer.set_reserved(voices + 1)
+            self.music = pygame.mixer.Channel(MUSIC_CHANNEL)
+            self.voices = [pygame.mixer.Channel(i) for i in range(voices + 1) if i != MUSIC_CHANNEL]
+            self.playing = [None] * voices
+
+    def _pick_voice(self, name, priority, limit):
+        """Index of the voice to use, counting steals; None drops the sound"""
+        for i, voice in enumerate(self.voices):
+            if self.playing[i] is not None and not voice.get_busy():
+                self.playing[i] = None
+        same = [i for i, held in enumerate(self.playing) if held and held[0] == name]
+        if len(same) >= limit:
+            self.counts["stolen"] += 1
+            return min(same, key=lambda i: self.playing[i][2])
+        if None in self.playing:
+            return self.playing.index(None)
+        victims = [i for i, held in enumerate(self.playing) if held[1] <= priority]
+        if not victims:
+            return None
+        self.counts["stolen"] += 1
+        return min(victims, key=lambda i: (self.playing[i][1], self.playing[i][2]))
+
+    def play(self, name):
+        snd = ASSETS.get(name)
+        if not self.enabled or snd is None:
+            return False
+        priority, limit, cooldown = SOUND_RULES.get(name, DEFAULT_SOUND_RULE)
+        now = pygame.time.get_ticks()
+        last = self.last_played.get(name)
+        if last is not None and 0 <= now - last < cooldown:  # ticks restart under tools/replay.py
+            self.counts["coalesced"] += 1
+            return False
+        index = self._pick_voice(name, priority, limit)
+        if index is None:
+            self.counts["dropped"] += 1
+            return False
+        self.voices[index].play(snd)
+        self.playing[index] = (name, priority, now)
+        self.last_played[name] = now
+        self.counts["played"] += 1
+        return True
+
+    def play_music(self, snd, volume):
+        if self.music is None or snd is None:
+            return
+        snd.set_volume(volume)
+        self.music.play(snd, loops=-1)
+
+    def stats(self):
+        return dict(self.counts, busy=sum(held is not None for held in self.playing))
+
+AUDIO = AudioManager(SFX_VOICES, sound_enabled)
+
+def play_sound(name):
+    AUDIO.play(name)
+
+def start_music():
+    AUDIO.play_music(ASSETS.get(MUSIC_THEME), 0.25)
+
+if sound_enabled:
+    for _name in (SND_JUMP, SND_COIN, SND_PIPE, SND_STAGE_CLEAR, SND_POWERUP, SND_KISS, SND_LIGHTNING, MUSIC_THEME):
+        if AUDIO_PACK and _name in AUDIO_PACK:
+            ASSETS.register_packed(_name, AUDIO_PACK)
+        else:
+            ASSETS.register(_name, "sound", _name + ".wav")
+
+# ------------------------- INPUT -------------------------
+# Always queued: QUIT, and KEYDOWN for the profiler's F3/F4 hotkeys
+BASE_EVENTS = (pygame.QUIT, pygame.KEYDOWN)
+
+class InputManager:
+    """One event drain and one key/mouse snapshot per frame.
+
+    configure() lets only BASE_EVENTS and the event types a scene declares
+    onto the queue; everything else (motion, key-ups, window and text events)
+    is dropped by SDL before it reaches Python. The cursor is read once per
+    frame instead of from MOUSEMOTION events, and left clicks are routed to
+    the registered Buttons under them. Positions are window pixels, the
+    coordinates scenes lay out in at every render scale (ScaledScreen maps
+    them to render pixels when drawing), so they hit-test as they are.
+    """
+
+    def __init__(self):
+        self.keys = None
+        self.cursor = (0, 0)
+        self.clicks = []      # positions of this frame's left clicks
+        self.pressed = []     # registered buttons those clicks landed on
+        self.buttons = ()
+        self.active = False   # any event or cursor movement this frame
+
+    def configure(self, event_types=(), buttons=()):
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(list(BASE_EVENTS) + list(event_types))
+        self.buttons = tuple(buttons)
+        self.poll_cursor()
+
+    def poll_cursor(self):
+        self.cursor = pygame.mouse.get_pos()
+
+    def poll(self):
+        """Drain the queue and refresh the snapshot; returns this frame's events"""
+        self.clicks.clear()
+        self.pressed.clear()
+        cursor = self.cursor
+        events = pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            PROFILER.handle_event(event)
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.clicks.append(event.pos)
+                self.pressed.extend(b for b in self.buttons if b.rect.collidepoint(event.pos))
+        self.keys = pygame.key.get_pressed()
+        self.poll_cursor()
+        self.active = bool(events) or self.cursor != cursor
+        return events
+
+    def clicked(self, button):
+        return button in self.pressed
+
+INPUT = InputManager()
 
 # ------------------------- UI -------------------------
 class Button:
@@ -97,25 +1428,34 @@ class Button:
         self.text = text
         self.base_color = base_color
         self.hover_color = hover_color
+        self.drawn_hover = None
+
+    def hover_changed(self):
+        return self.rect.collidepoint(INPUT.cursor) != self.drawn_hover
+
+    @staticmethod
+    def paint_frame(surf, color):
+        rect = surf.get_rect()
+        pygame.draw.rect(surf, color, rect, border_radius=12)
+        pygame.draw.rect(surf, WHITE, rect, 3, border_radius=12)
+
+    def frame(self, color):
+        return baked_sprite(("button", self.rect.size, color), self.rect.size, self.paint_frame, color)
 
     def draw(self, surf):
-        mouse_pos = pygame.mouse.get_pos()
-        color = self.hover_color if self.rect.collidepoint(mouse_pos) else self.base_color
-        pygame.draw.rect(surf, color, self.rect, border_radius=12)
-        pygame.draw.rect(surf, WHITE, self.rect, 3, border_radius=12)
-        txt = FONT_MED.render(self.text, True, WHITE)
+        hovered = self.rect.collidepoint(INPUT.cursor)
+        if hovered != self.drawn_hover:
+            self.drawn_hover = hovered
+            DIRTY.add(self.rect)
+        surf.blit(self.frame(self.hover_color if hovered else self.base_color), self.rect)
+        txt = render_text(FONT_MED, self.text, True, WHITE)
         surf.blit(txt, txt.get_rect(center=self.rect.center))
 
-    def is_clicked(self, event):
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            return self.rect.collidepoint(event.pos)
-        return False
-
 # ------------------------- MARIO GIRL -------------------------
 class MarioGirl:
     def __init__(self, x=WIDTH//2, y=HEIGHT-150):
-        self.x = x
-        self.y = y
+        self.x = self.prev_x = x
+        self.y = self.prev_y = y
         self.vx = 0
         self.vy = 0
         self.speed = 5
@@ -125,8 +1465,18 @@ class MarioGirl:
         self.facing_right = True
         self.walk_frame = 0
         self.rect = pygame.Rect(self.x, self.y, 32, 48)
+        self.world_width = WIDTH
+        self.drawn_rect = None
+        self.drawn_pose = None
+
+    def place(self, x, y):
+        """Teleport without interpolating from the old position"""
+        self.x = self.prev_x = x
+        self.y = self.prev_y = y
 
     def handle_keys(self, keys):
+        """Advance one fixed simulation step"""
+        self.prev_x, self.prev_y = self.x, self.y
         self.vx = 0
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
             self.vx = -self.speed
@@ -148,16 +1498,28 @@ class MarioGirl:
             self.y = HEIGHT - 100
             self.vy = 0
             self.on_ground = True
-        self.x = max(0, min(self.x, WIDTH - 32))
+        self.x = max(0, min(self.x, self.world_width - 32))
         self.rect.topleft = (int(self.x), int(self.y))
 
-    def draw(self, surf):
-        x, y = int(self.x), int(self.y)
+    def report_dirty(self, x, y):
+        pose = (x, y, self.facing_right, self.walk_frame % 20 < 10)
+        if pose != self.drawn_pose:
+            bounds = pygame.Rect((x, y - self.SPRITE_TOP), self.SPRITE_SIZE)
+            DIRTY.add(bounds.union(self.drawn_rect) if self.drawn_rect else bounds)
+            self.drawn_rect = bounds
+            self.drawn_pose = pose
+
+    # Sprite covers the hair bun (6 px above y) down to the shoes
+    SPRITE_SIZE = (32, 56)
+    SPRITE_TOP = 6
+
+    @staticmethod
+    def paint(surf, x, y, facing_right, stride):
         pygame.draw.ellipse(surf, PINK_DARK, (x+2, y-2, 28, 14))
         pygame.draw.circle(surf, PINK_LIGHT, (x+16, y+4), 10)
         pygame.draw.rect(surf, PINK_DARK, (x+4, y, 24, 10), 0, 6)
         pygame.draw.ellipse(surf, MARIO_SKIN, (x+6, y+10, 20, 16))
-        eye_offset = 1 if not self.facing_right else -1
+        eye_offset = 1 if not facing_right else -1
         pygame.draw.circle(surf, BLACK, (x+11 + eye_offset, y+16), 2)
         pygame.draw.circle(surf, BLACK, (x+21 + eye_offset, y+16), 2)
         pygame.draw.circle(surf, MARIO_RED, (x+16, y+19), 2)
@@ -165,16 +1527,63 @@ class MarioGirl:
         pygame.draw.circle(surf, YELLOW, (x+12, y+28), 2)
         pygame.draw.circle(surf, YELLOW, (x+20, y+28), 2)
         pygame.draw.polygon(surf, PINK, [(x+8, y+35), (x+24, y+35), (x+26, y+44), (x+6, y+44)])
-        arm_y = 2 if self.walk_frame % 20 < 10 else 0
+        arm_y = 2 if stride else 0
         pygame.draw.rect(surf, MARIO_SKIN, (x+2, y+28 + arm_y, 6, 12), 0, 2)
         pygame.draw.rect(surf, MARIO_SKIN, (x+24, y+28 - arm_y, 6, 12), 0, 2)
-        leg_offset = 3 if self.walk_frame % 20 < 10 else -3
+        leg_offset = 3 if stride else -3
         pygame.draw.rect(surf, YELLOW, (x+9 + leg_offset, y+44, 6, 4), 0, 2)
         pygame.draw.rect(surf, YELLOW, (x+17 - leg_offset, y+44, 6, 4), 0, 2)
 
+    @classmethod
+    def sprite(cls, facing_right, stride):
+        return baked_sprite(("girl", facing_right, stride), cls.SPRITE_SIZE,
+                            cls.paint, 0, cls.SPRITE_TOP, facing_right, stride)
+
+    def position(self, alpha=1.0):
+        """Interpolated world position between the last two fixed steps"""
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+
+    def draw(self, surf, alpha=1.0, camera_x=0):
+        x, y = self.position(alpha)
+        x, y = int(x) - camera_x, int(y)
+        self.report_dirty(x, y)
+        surf.blit(self.sprite(self.facing_right, self.walk_frame % 20 < 10), (x, y - self.SPRITE_TOP))
+
 # ------------------------- BODY PARTS -------------------------
 PART_NAMES = ["Legs", "Hands", "Torso", "Head", "Brain", "Heart"]
 
+# Glow rings as (alpha, radius inset), outermost first. The sparkle pulse keeps
+# the outer radius within 27..33 px, so one baked sprite per integer radius.
+GLOW_COLOR = (255, 215, 0)
+GLOW_LAYERS = ((100, 0), (70, 5), (40, 10))
+GLOW_RADII = range(27, 34)
+
+def paint_glow(surf, radius, layers):
+    # Stacked rings of one colour blend to alpha 1 - prod(1 - a_i); with fewer
+    # layers only the innermost rings are painted, at their stacked alpha
+    center = surf.get_width() // 2
+    transparency = 1.0
+    for n, (alpha, inset) in enumerate(GLOW_LAYERS):
+        transparency *= 1 - alpha / 255
+        if n >= len(GLOW_LAYERS) - layers:
+            coverage = round(255 * (1 - transparency))
+            pygame.draw.circle(surf, (*GLOW_COLOR, coverage), (center, center), radius - inset)
+
+def glow_inset(layers):
+    """Offset of a reduced glow sprite inside the full 80x80 square"""
+    return GLOW_LAYERS[len(GLOW_LAYERS) - layers][1]
+
+def glow_sprite(radius, layers=len(GLOW_LAYERS)):
+    """Return the glow for radius with its rings pre-composited (80x80 with every layer)"""
+    side = 80 - 2 * glow_inset(layers)
+    return baked_sprite(("glow", radius, layers), (side, side), paint_glow, radius, layers)
+
+def bake_glow_sprites():
+    for radius in GLOW_RADII:
+        for layers in {len(GLOW_LAYERS), 1}:
+            glow_sprite(radius, layers)
+
 class BodyPart:
     def __init__(self, name, pos):
         self.name = name
@@ -182,46 +1591,81 @@ class BodyPart:
         self.collected = False
         self.float_offset = 0
         self.sparkle_timer = 0
+        self.drawn_rect = None
+
+    def reset(self):
+        self.collected = False
+        self.float_offset = 0
+        self.sparkle_timer = 0
+        self.drawn_rect = None
 
     def update(self):
         self.float_offset = math.sin(pygame.time.get_ticks() / 200) * 8
         self.sparkle_timer += 1
 
-    def draw(self, surf):
+    def report_dirty(self, camera_x=0):
+        """Glow, icon and name tag all fit in the 80x80 glow square"""
+        bounds = None
+        if not self.collected:
+            bounds = pygame.Rect(self.rect.x - camera_x - 15, int(self.rect.y + self.float_offset) - 15, 80, 81)
+        if bounds != self.drawn_rect:
+            DIRTY.add(bounds.union(self.drawn_rect) if bounds and self.drawn_rect else bounds or self.drawn_rect)
+            self.drawn_rect = bounds
+
+    def draw(self, surf, camera_x=0):
+        self.report_dirty(camera_x)
         if self.collected:
             return
-        x, y = self.rect.x, self.rect.y + self.float_offset
-
-        # Glow
-        glow_radius = 30 + math.sin(self.sparkle_timer / 10) * 3
-        for i in range(3):
-            alpha = 100 - i * 30
-            glow_surf = pygame.Surface((80, 80), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surf, (255, 215, 0, alpha), (40, 40), int(glow_radius - i*5))
-            surf.blit(glow_surf, (x-15, y-15))
-
-        # Draw part based on type
-        if self.name == "Heart":
+        x, y = self.rect.x - camera_x, self.rect.y + self.float_offset
+
+        # Glow, thinned or skipped by the quality controller
+        layers = QUALITY.glow_layers
+        if layers:
+            glow_radius = 30 + math.sin(self.sparkle_timer / 10) * 3
+            inset = glow_inset(layers)
+            surf.blit(glow_sprite(int(glow_radius), layers), (x-15 + inset, y-15 + inset))
+
+        # Icon, frame and name tag
+        surf.blit(self.sprite(self.name), (x-2, y-2))
+
+    @staticmethod
+    def paint(surf, name, x, y):
+        """Icon, frame and name tag for a part whose 50x45 box starts at (x, y)"""
+        if name == "Heart":
             draw_heart(surf, (x + 25, y + 20), RED, 20)
-        elif self.name == "Legs":
+        elif name == "Legs":
             pygame.draw.rect(surf, MARIO_SKIN, (x+12, y+10, 12, 25), 0, 4)
             pygame.draw.rect(surf, MARIO_SKIN, (x+26, y+10, 12, 25), 0, 4)
-        elif self.name == "Hands":
+        elif name == "Hands":
             pygame.draw.circle(surf, MARIO_SKIN, (x+15, y+20), 12)
             pygame.draw.circle(surf, MARIO_SKIN, (x+35, y+20), 12)
-        elif self.name == "Torso":
+        elif name == "Torso":
             pygame.draw.rect(surf, MARIO_SKIN, (x+10, y+5, 30, 35), 0, 8)
-        elif self.name == "Head":
+        elif name == "Head":
             pygame.draw.circle(surf, MARIO_SKIN, (x+25, y+22), 18)
-        elif self.name == "Brain":
+        elif name == "Brain":
             pygame.draw.ellipse(surf, PINK, (x+10, y+10, 30, 25))
 
-        pygame.draw.rect(surf, YELLOW, (self.rect.x-2, self.rect.y + self.float_offset-2, 54, 49), 3, 8)
-        name_bg = FONT_TINY.render(self.name, True, WHITE)
+        pygame.draw.rect(surf, YELLOW, (x-2, y-2, 54, 49), 3, 8)
+        name_bg = render_text(FONT_TINY, name, True, WHITE)
         surf.blit(name_bg, (x+5, y+40))
 
+    @classmethod
+    def sprite(cls, name):
+        label = render_text(FONT_TINY, name, True, WHITE)
+        size = (max(54, 7 + label.get_width()), 42 + label.get_height())
+        return baked_sprite(("part", name), size, cls.paint, name, 2, 2)
+
 # ------------------------- ASSEMBLY -------------------------
 ASSEMBLY_ORDER = ["Legs", "Torso", "Hands", "Head", "Brain", "Heart"]
+ASSEMBLY_POSITIONS = {
+    "Legs": (WIDTH//2, HEIGHT//2 + 80),
+    "Torso": (WIDTH//2, HEIGHT//2 + 20),
+    "Hands": (WIDTH//2, HEIGHT//2 - 40),
+    "Head": (WIDTH//2, HEIGHT//2 - 100),
+    "Brain": (WIDTH//2 + 100, HEIGHT//2 - 100),
+    "Heart": (WIDTH//2 - 100, HEIGHT//2 + 20)
+}
 
 class AssemblySlot:
     def __init__(self, name, center):
@@ -229,40 +1673,76 @@ class AssemblySlot:
         self.center = center
         self.filled = False
         self.pulse = 0
+        self.drawn_state = None
+
+    def reset(self):
+        self.filled = False
+        self.pulse = 0
+        self.drawn_state = None
 
     def update(self):
         self.pulse += 0.1
 
+    @staticmethod
+    def paint_filled(surf, name, x, y):
+        if name == "Legs":
+            pygame.draw.rect(surf, GREEN_ZOMBIE, (x+12, y+10, 12, 30), 0, 4)
+            pygame.draw.rect(surf, GREEN_ZOMBIE, (x+26, y+10, 12, 30), 0, 4)
+        elif name == "Torso":
+            pygame.draw.rect(surf, GREEN_ZOMBIE, (x+10, y+5, 30, 40), 0, 8)
+        elif name == "Hands":
+            pygame.draw.circle(surf, GREEN_ZOMBIE, (x+15, y+22), 10)
+            pygame.draw.circle(surf, GREEN_ZOMBIE, (x+35, y+22), 10)
+        elif name == "Head":
+            pygame.draw.circle(surf, GREEN_ZOMBIE, (x+25, y+22), 18)
+        elif name == "Brain":
+            pygame.draw.ellipse(surf, PINK, (x+10, y+10, 30, 22))
+        elif name == "Heart":
+            draw_heart(surf, (x+25, y+22), RED, 16)
+
+    @classmethod
+    def filled_sprite(cls, name):
+        return baked_sprite(("slot", name), (50, 48), cls.paint_filled, name, 0, 0)
+
+    # One pulse period: update() advances the phase 0.1 rad per step
+    PULSE_FRAMES = 63
+    PULSE_PALETTE = clip_palette([(255, 0, 255), GREY, PINK_LIGHT], [(GREY, WHITE)])
+
+    @staticmethod
+    def paint_pulse(surf, index, name, center):
+        scale = 1 + math.sin(index * 0.1) * 0.05
+        rect = pygame.Rect(0, 0, int(80 * scale), int(60 * scale))
+        rect.center = center
+        pygame.draw.rect(surf, GREY, rect, 0, 12)
+        pygame.draw.rect(surf, PINK_LIGHT, rect, 4, 12)
+        label = clip_text(FONT_SMALL, name, WHITE, GREY)
+        surf.blit(label, label.get_rect(center=center))
+        bounds = pygame.Rect(0, 0, 88, 66)  # largest pulse step
+        bounds.center = center
+        return bounds
+
+    def pulse_clip(self, request_only=False):
+        bake = CLIPS.request if request_only else CLIPS.clip
+        return bake(("pulse", self.name, self.center), self.PULSE_FRAMES, self.paint_pulse,
+                    self.PULSE_PALETTE, self.name, self.center, transparent=True)
+
     def draw(self, surf):
-        scale = 1 + math.sin(self.pulse) * 0.05 if not self.filled else 1
-        w, h = int(80 * scale), int(60 * scale)
-        rect = pygame.Rect(0, 0, w, h)
-        rect.center = self.center
+        index = round(self.pulse * 10) % self.PULSE_FRAMES
+        state = (self.filled, index)
+        if state != self.drawn_state:
+            self.drawn_state = state
+            bounds = pygame.Rect(0, 0, 88, 66)  # largest pulse step
+            bounds.center = self.center
+            DIRTY.add(bounds)
 
         if self.filled:
-            x, y = rect.centerx - 25, rect.centery - 22
-            if self.name == "Legs":
-                pygame.draw.rect(surf, GREEN_ZOMBIE, (x+12, y+10, 12, 30), 0, 4)
-                pygame.draw.rect(surf, GREEN_ZOMBIE, (x+26, y+10, 12, 30), 0, 4)
-            elif self.name == "Torso":
-                pygame.draw.rect(surf, GREEN_ZOMBIE, (x+10, y+5, 30, 40), 0, 8)
-            elif self.name == "Hands":
-                pygame.draw.circle(surf, GREEN_ZOMBIE, (x+15, y+22), 10)
-                pygame.draw.circle(surf, GREEN_ZOMBIE, (x+35, y+22), 10)
-            elif self.name == "Head":
-                pygame.draw.circle(surf, GREEN_ZOMBIE, (x+25, y+22), 18)
-            elif self.name == "Brain":
-                pygame.draw.ellipse(surf, PINK, (x+10, y+10, 30, 22))
-            elif self.name == "Heart":
-                draw_heart(surf, (x+25, y+22), RED, 16)
+            surf.blit(self.filled_sprite(self.name), (self.center[0] - 25, self.center[1] - 22))
         else:
-            pygame.draw.rect(surf, GREY, rect, 0, 12)
-            pygame.draw.rect(surf, PINK_LIGHT, rect, 4, 12)
-            label = FONT_SMALL.render(self.name, True, WHITE)
-            surf.blit(label, label.get_rect(center=self.center))
+            self.pulse_clip().blit(surf, index)
 
 # ------------------------- ROOM SYSTEM -------------------------
-ROOMS = ["Bedroom", "Living Room", "Kitchen", "Lab"]
+# Background looks a room can ask for with "style" in its level file
+ROOM_STYLES = ("sky", "lab")
 
 def draw_heart(surf, pos, color, size=14):
     x, y = pos
@@ -270,52 +1750,359 @@ def draw_heart(surf, pos, color, size=14):
     pygame.draw.circle(surf, color, (x + size//4, y), size//4)
     pygame.draw.polygon(surf, color, [(x - size//2, y), (x + size//2, y), (x, y + size//2)])
 
-def draw_room_background(room_name):
-    """Draw room backgrounds"""
-    SCREEN.fill((50, 40, 30))
-    if room_name != "Lab":
-        for y in range(0, HEIGHT - 100, 2):
-            shade = int(100 + (y / (HEIGHT - 100)) * 100)
+FLOOR_TILE = 50
+
+def paint_room_background(surf, style, x0=0):
+    """Paint a room style's backdrop and floor onto surf (uncached, one primitive at a time).
+
+    x0 is the world x of the surface's left edge, so chunks tile seamlessly.
+    """
+    width, height = surf.get_size()
+    surf.fill((50, 40, 30))
+    if style == "sky":
+        for y in range(0, height - 100, 2):
+            shade = int(100 + (y / (height - 100)) * 100)
             color = (shade, shade + 30, 255)
-            pygame.draw.line(SCREEN, color, (0, y), (WIDTH, y))
+            pygame.draw.line(surf, color, (0, y), (width, y))
     else:
-        SCREEN.fill(DARK_GREY)
-        pygame.draw.rect(SCREEN, PURPLE, (0, 0, WIDTH, HEIGHT - 100))
+        surf.fill(DARK_GREY)
+        pygame.draw.rect(surf, PURPLE, (0, 0, width, height - 100))
 
     # Floor
-    for x in range(0, WIDTH, 50):
-        pygame.draw.rect(SCREEN, WOOD_DARK, (x, HEIGHT-100, 48, 98))
-        pygame.draw.rect(SCREEN, WOOD_LIGHT, (x+3, HEIGHT-97, 42, 92), 0, 3)
+    for x in range(-(x0 % FLOOR_TILE), width, FLOOR_TILE):
+        pygame.draw.rect(surf, WOOD_DARK, (x, height-100, 48, 98))
+        pygame.draw.rect(surf, WOOD_LIGHT, (x+3, height-97, 42, 92), 0, 3)
+
+def background_key(style, x0, size):
+    """Atlas key of a background strip; rooms of one style share their strips,
+    and strips starting at the same floor-tile phase are identical"""
+    return ("background", style, x0 % FLOOR_TILE, size)
+
+# Static backgrounds are cut into CHUNK_WIDTH-wide strips, copied from the
+# atlas or painted on first sight and evicted least-recently-used, so memory
+# stays at capacity chunks however wide a room is. 16 chunks cover every room
+# of the current levels.
+CHUNK_WIDTH = 250
+
+class ChunkCache:
+    """Bounded LRU of display-format background chunks keyed by (style, index)"""
+
+    def __init__(self, capacity=16, width=CHUNK_WIDTH):
+        self.capacity = capacity
+        self.width = width
+        self.height = None  # chunks are only valid for the window height they were painted at
+        self.painted = 0
+        self.unpacked = 0  # copied from the atlas instead of painted
+        self.evicted = 0
+        self._chunks = OrderedDict()
+
+    def get(self, style, index):
+        key = (style, index)
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+        chunk = pygame.Surface((self.width, self.height)).convert()
+        x0 = index * self.width
+        packed = ATLAS.get(background_key(style, x0, chunk.get_size()))
+        if packed is not None:
+            chunk.blit(packed, (0, 0))
+            self.unpacked += 1
+        else:
+            paint_room_background(chunk, style, x0)
+            self.painted += 1
+        self._chunks[key] = chunk
+        if len(self._chunks) > self.capacity:
+            self._chunks.popitem(last=False)
+            self.evicted += 1
+        return chunk
+
+    def clear(self):
+        self._chunks.clear()
+        self.height = None
+
+    def stats(self):
+        return {"size": len(self._chunks), "capacity": self.capacity,
+                "painted": self.painted, "unpacked": self.unpacked, "evicted": self.evicted}
+
+BACKGROUND_CHUNKS = ChunkCache()
+
+def clear_background_cache():
+    BACKGROUND_CHUNKS.clear()
+
+def chunk_range(camera_x=0):
+    """Indices of the chunks under the camera; drops chunks painted for another window height"""
+    width, height = SCREEN.get_size()
+    if height != BACKGROUND_CHUNKS.height:
+        BACKGROUND_CHUNKS.clear()
+        BACKGROUND_CHUNKS.height = height
+    chunk_w = BACKGROUND_CHUNKS.width
+    return range(camera_x // chunk_w, (camera_x + width - 1) // chunk_w + 1)
+
+def room_background_tasks(style, camera_x=0):
+    """One keyed idle task per chunk under the camera, so each paints in its own slice"""
+    return {("chunk", style, i): lambda i=i: BACKGROUND_CHUNKS.get(style, i)
+            for i in chunk_range(camera_x)}
+
+def draw_room_background(style, camera_x=0):
+    """Draw the chunks of a room style's background under the camera"""
+    with PROFILER.section("draw_room_background"):
+        chunk_w = BACKGROUND_CHUNKS.width
+        SCREEN.blits([(BACKGROUND_CHUNKS.get(style, i), (i * chunk_w - camera_x, 0))
+                      for i in chunk_range(camera_x)], False)
+
+def paint_door(surf, x, y):
+    pygame.draw.rect(surf, MARIO_GREEN, (x-28, y-75, 56, 95), 0, 12)
+    pygame.draw.rect(surf, (30, 160, 40), (x-25, y-72, 50, 89), 0, 10)
+    pygame.draw.ellipse(surf, MARIO_GREEN, (x-32, y-82, 64, 24))
+    pygame.draw.ellipse(surf, BLACK, (x-20, y-55, 40, 40))
+
+def door_sprite():
+    return baked_sprite(("door",), (64, 102), paint_door, 32, 82)
 
 def draw_door(x, y):
     """Draw Mario pipe door"""
-    pygame.draw.rect(SCREEN, MARIO_GREEN, (x-28, y-75, 56, 95), 0, 12)
-    pygame.draw.rect(SCREEN, (30, 160, 40), (x-25, y-72, 50, 89), 0, 10)
-    pygame.draw.ellipse(SCREEN, MARIO_GREEN, (x-32, y-82, 64, 24))
-    pygame.draw.ellipse(SCREEN, BLACK, (x-20, y-55, 40, 40))
+    SCREEN.blit(door_sprite(), (x - 32, y - 82))
+
+class Door:
+    """Pipe door whose trigger rect is computed once"""
+
+    def __init__(self, room, x, y):
+        self.room = room
+        self.x, self.y = x, y
+        self.rect = pygame.Rect(x - 35, y - 80, 70, 100)
+
+    def draw(self, camera_x=0):
+        draw_door(self.x - camera_x, self.y)
+
+# ------------------------- LEVELS -------------------------
+LEVEL_DIR = "levels"
+
+class RoomLayout:
+    """One room of a level file: its width, background style, spawn point, parts and door"""
+
+    def __init__(self, data):
+        self.name = data["name"]
+        self.width = data.get("width", WIDTH)
+        self.style = data.get("style", "sky")
+        if self.style not in ROOM_STYLES:
+            raise ValueError(f"room {self.name!r} has unknown style {self.style!r}")
+        self.spawn = tuple(data.get("spawn", (100, HEIGHT - 150)))
+        self.parts = [(p["name"], (p["x"], p["y"])) for p in data.get("parts", [])]
+        self.door = tuple(data["door"]) if "door" in data else None
+
+class Level:
+    """Rooms in play order, loaded from levels/<name>.json"""
+
+    def __init__(self, data):
+        self.rooms = OrderedDict((room["name"], RoomLayout(room)) for room in data["rooms"])
+        start = data.get("start", {})
+        self.start_room = start.get("room", next(iter(self.rooms)))
+        self.start_pos = (start.get("x", WIDTH//2), start.get("y", HEIGHT - 150))
+
+    def next_room(self, name):
+        names = list(self.rooms)
+        return names[(names.index(name) + 1) % len(names)]
+
+def load_level(name):
+    with open(os.path.join(LEVEL_DIR, name + ".json"), encoding="utf-8") as f:
+        return Level(json.load(f))
+
+class Camera:
+    """Horizontal camera that keeps its target centred inside the room"""
+
+    def __init__(self, view_width=WIDTH):
+        self.view_width = view_width
+        self.x = 0
+        self.world_width = view_width
+
+    def follow(self, target_x):
+        self.x = int(max(0, min(target_x - self.view_width // 2, self.world_width - self.view_width)))
+
+    def view(self, margin=0):
+        """World-space rect under the camera, grown by margin on each side"""
+        return pygame.Rect(self.x - margin, -margin, self.view_width + 2 * margin, HEIGHT + 2 * margin)
+
+WARP_FRAMES = 40
+WARP_PALETTE = clip_palette([BLACK, MARIO_GREEN, PINK], [(BLACK, WHITE)])
+
+def paint_warp_frame(surf, i, to_room):
+    """Frame i of the pipe warp: a shrinking ring of dots around the room name"""
+    touched = None
+    for j in range(12):
+        angle = (i * 15 + j * 30) % 360
+        rad = math.radians(angle)
+        radius = 150 - i * 3
+        x = WIDTH//2 + math.cos(rad) * radius
+        y = HEIGHT//2 + math.sin(rad) * radius
+        color = MARIO_GREEN if j % 2 == 0 else PINK
+        size = int(20 - i * 0.4)
+        dot = pygame.draw.circle(surf, color, (int(x), int(y)), max(3, size))
+        touched = dot.union(touched) if touched else dot
+
+    text = clip_text(FONT_BIG, to_room, WHITE, BLACK)
+    text.set_colorkey(BLACK)
+    return touched.union(surf.blit(text, text.get_rect(center=(WIDTH//2, HEIGHT//2))))
+
+def warp_clip(to_room, request_only=False):
+    bake = CLIPS.request if request_only else CLIPS.clip
+    return bake(("warp", to_room), WARP_FRAMES, paint_warp_frame, WARP_PALETTE, to_room)
 
 async def room_transition_effect(from_room, to_room):
     """WEB SAFE: Pipe warp transition"""
     play_sound(SND_PIPE)
-    for i in range(40):
-        SCREEN.fill(BLACK)
-        for j in range(12):
-            angle = (i * 15 + j * 30) % 360
-            rad = math.radians(angle)
-            radius = 150 - i * 3
-            x = WIDTH//2 + math.cos(rad) * radius
-            y = HEIGHT//2 + math.sin(rad) * radius
-            color = MARIO_GREEN if j % 2 == 0 else PINK
-            size = int(20 - i * 0.4)
-            pygame.draw.circle(SCREEN, color, (int(x), int(y)), max(3, size))
-
-        text = FONT_BIG.render(to_room, True, WHITE)
-        SCREEN.blit(text, text.get_rect(center=(WIDTH//2, HEIGHT//2)))
-        pygame.display.flip()
-        CLOCK.tick(40)
-        await asyncio.sleep(0)  # WEB SAFE
+    clip = warp_clip(to_room)
+    for i in range(WARP_FRAMES):
+        PROFILER.begin_frame("transition")
+        with PROFILER.section("room_transition_effect"):
+            DIRTY.add(clip.blit(SCREEN, i))
+        DIRTY.present()
+        await CLOCK.tick(40)  # WEB SAFE
     await asyncio.sleep(0.4)  # WEB SAFE - replaces pygame.time.delay
 
+# ------------------------- PARTICLES -------------------------
+TITLE_HEART_SIZES = (4, 10)     # inclusive randint bounds
+ENDING_HEART_SIZES = (10, 20)
+
+def heart_sprite(color, size):
+    """Return (sprite, anchor) for a heart drawn once with draw_heart"""
+    anchor = (size // 2, size // 4)
+    sprite = baked_sprite(("heart", color, size), (size + 2, size + 2),
+                          draw_heart, anchor, color, size)
+    return sprite, anchor
+
+class ParticleSystem:
+    """Fixed-capacity heart particles stored as parallel arrays (struct-of-arrays).
+
+    Positions are in pixels, velocities in pixels per second and spawning is
+    driven by elapsed time, so behaviour does not depend on the frame rate.
+    Dead particles are removed by swapping the last live one into their slot.
+    """
+
+    def __init__(self, capacity, color, rate=0.0, spawner=None):
+        self.capacity = capacity
+        self.count = 0
+        self.color = color
+        self.rate = rate            # spawns per second
+        self.spawner = spawner      # callable(system) that calls spawn() once
+        self._spawn_debt = 0.0
+        self._sprites = {}          # size -> (sprite, anchor)
+        self._blits = []            # reused between frames, trimmed to the drawn count
+        if load_numpy() is not None:
+            self.x = np.zeros(capacity, np.float32)
+            self.y = np.zeros(capacity, np.float32)
+            self.vx = np.zeros(capacity, np.float32)
+            self.vy = np.zeros(capacity, np.float32)
+            self.size = np.zeros(capacity, np.int16)
+            self._scratch = np.zeros(capacity, np.float32)
+            self._mask = np.zeros(capacity, bool)
+            self._mask_hi = np.zeros(capacity, bool)
+        else:
+            self.x = array("f", bytes(4 * capacity))
+            self.y = array("f", bytes(4 * capacity))
+            self.vx = array("f", bytes(4 * capacity))
+            self.vy = array("f", bytes(4 * capacity))
+            self.size = array("h", bytes(2 * capacity))
+
+    def clear(self):
+        self.count = 0
+        self._spawn_debt = 0.0
+
+    def spawn(self, x, y, vx, vy, size):
+        if self.count >= self.capacity:
+            return False
+        i = self.count
+        self.x[i], self.y[i], self.vx[i], self.vy[i], self.size[i] = x, y, vx, vy, size
+        self.count += 1
+        return True
+
+    def emit(self, dt):
+        """Spawn rate * dt particles, carrying the fractional remainder"""
+        if not self.spawner or self.rate <= 0:
+            return
+        self._spawn_debt += self.rate * dt
+        while self._spawn_debt >= 1:
+            self._spawn_debt -= 1
+            self.spawner(self)
+
+    def update(self, dt):
+        n = self.count
+        if n == 0:
+            return
+        if np is not None:
+            scratch = self._scratch[:n]
+            np.multiply(self.vx[:n], dt, out=scratch)
+            self.x[:n] += scratch
+            np.multiply(self.vy[:n], dt, out=scratch)
+            self.y[:n] += scratch
+        else:
+            x, y, vx, vy = self.x, self.y, self.vx, self.vy
+            for i in range(n):
+                x[i] += vx[i] * dt
+                y[i] += vy[i] * dt
+
+    def _dead_indices(self, min_y, max_y):
+        """Yield particles with y <= min_y or y > max_y, highest index first.
+
+        With NumPy the dead are marked in the preallocated mask and taken
+        from it one at a time, so culling allocates no index array; the
+        caller must remove or revive each one before asking for the next.
+        """
+        n = self.count
+        if np is not None:
+            mask = self._mask[:n]
+            ys = self.y[:n]
+            np.less_equal(ys, min_y, out=mask)
+            np.greater(ys, max_y, out=self._mask_hi[:n])
+            mask |= self._mask_hi[:n]
+            while mask.any():
+                i = n - 1 - int(mask[::-1].argmax())
+                mask[i] = False  # whatever takes slot i next is alive
+                yield i
+            return
+        y = self.y
+        yield from [i for i in range(n - 1, -1, -1) if y[i] <= min_y or y[i] > max_y]
+
+    def cull(self, min_y, max_y):
+        """Swap-remove every particle with y <= min_y or y > max_y"""
+        for i in self._dead_indices(min_y, max_y):
+            last = self.count - 1
+            if i != last:
+                self.x[i], self.y[i] = self.x[last], self.y[last]
+                self.vx[i], self.vy[i] = self.vx[last], self.vy[last]
+                self.size[i] = self.size[last]
+            self.count = last
+
+    def wrap(self, max_y, reset_y, width):
+        """Send particles below max_y back to reset_y at a random x"""
+        for i in self._dead_indices(-math.inf, max_y):
+            self.y[i] = reset_y
+            self.x[i] = random.randint(0, width)
+
+    def draw(self, surf, limit=None):
+        """Draw the live particles, or only the first limit of them"""
+        n = self.count if limit is None else min(self.count, limit)
+        if n == 0:
+            return
+        # tolist() is the cheapest way to get Python numbers out of the arrays;
+        # those three lists and the (sprite, pos) tuples are the per-frame cost
+        color = self.color
+        sprites = self._sprites
+        blits = self._blits
+        if len(blits) > n:
+            del blits[n:]
+        for i, (x, y, size) in enumerate(zip(self.x[:n].tolist(), self.y[:n].tolist(), self.size[:n].tolist())):
+            entry = sprites.get(size)
+            if entry is None:
+                entry = sprites[size] = heart_sprite(color, size)
+            sprite, (ax, ay) = entry
+            item = (sprite, (int(x) - ax, int(y) - ay))
+            if i < len(blits):
+                blits[i] = item
+            else:
+                blits.append(item)
+        surf.blits(blits, False)
+
 # ------------------------- STATES -------------------------
 STATE_TITLE = "TITLE"
 STATE_STAGE1 = "STAGE1"
@@ -324,332 +2111,656 @@ STATE_STAGE3 = "STAGE3"
 STATE_ENDING = "ENDING"
 
 # ------------------------- SCENES -------------------------
-async def title_scene():
+class Scene:
+    """Long-lived scene that keeps its objects and warm caches between visits.
+
+    build() creates everything expensive once, either on first entry or
+    earlier from prefetch() while the previous scene idles. reset() restores
+    per-visit state, run() plays one visit and returns the next state, and
+    next_state names the likely successor to prefetch meanwhile.
+    """
+
+    next_state = None
+    input_events = ()  # event types queued while this scene runs, besides BASE_EVENTS
+
+    def __init__(self):
+        self.built = False
+
+    def build(self):
+        pass
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+            self.built = True
+
+    def prefetch_tasks(self):
+        """Small callables that warm this scene; run in idle time before entry"""
+        return [self.ensure_built, self.queue_warm_tasks]
+
+    def warm_tasks(self):
+        """{key: task} cache warm-ups that need the built scene"""
+        return {}
+
+    def queue_warm_tasks(self):
+        """Idle task after build: queue warm_tasks(), skipping any still waiting"""
+        for key, task in self.warm_tasks().items():
+            IDLE.add(task, key)
+
+    def prefetch(self):
+        for task in self.prefetch_tasks():
+            IDLE.add(task)
+
+    def reset(self):
+        pass
+
+    def buttons(self):
+        """Buttons that receive clicks while this scene runs"""
+        return ()
+
+    def enter(self):
+        self.ensure_built()
+        self.reset()
+        INPUT.configure(self.input_events, self.buttons())
+        DIRTY.invalidate()
+
+    def exit(self):
+        pass
+
+    async def run(self):
+        raise NotImplementedError
+
+    async def play(self, *args):
+        self.enter(*args)
+        successor = SCENES.get(self.next_state)
+        if successor is not None:
+            successor.prefetch()
+        try:
+            return await self.run()
+        finally:
+            self.exit()
+
+class TitleScene(Scene):
     """WEB SAFE: Title screen"""
-    start_button = Button((WIDTH//2 - 140, HEIGHT//2 + 80, 280, 80), "ðŸŽ® Start Game")
-    particles = []
-    for _ in range(40):
-        particles.append({
-            'x': random.randint(0, WIDTH),
-            'y': random.randint(0, HEIGHT),
-            'speed': random.uniform(0.3, 1.5),
-            'size': random.randint(4, 10)
-        })
-
-    running = True
-    while running:
-        await asyncio.sleep(0)  # WEB SAFE
-        CLOCK.tick(60)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if start_button.is_clicked(event):
+
+    next_state = STATE_STAGE1
+    input_events = (pygame.MOUSEBUTTONDOWN,)
+
+    def build(self):
+        self.start_button = Button((WIDTH//2 - 140, HEIGHT//2 + 80, 280, 80), "ðŸŽ® Start Game")
+        self.hearts = ParticleSystem(40, PINK_LIGHT)
+
+    def buttons(self):
+        return (self.start_button,)
+
+    def reset(self):
+        self.start_button.drawn_hover = None
+        self.hearts.clear()
+        for _ in range(40):
+            # Speeds are in pixels per second (0.3-1.5 px per frame at 60 fps)
+            self.hearts.spawn(random.randint(0, WIDTH), random.randint(0, HEIGHT),
+                              0, random.uniform(18, 90), random.randint(*TITLE_HEART_SIZES))
+
+    async def run(self):
+        start_button, hearts = self.start_button, self.hearts
+        sim = FixedStep()
+        running = True
+        while running:
+            frame_ms = await CLOCK.tick(RENDER_FPS)  # WEB SAFE
+            PROFILER.begin_frame("title")
+            INPUT.poll()
+            if INPUT.clicked(start_button):
                 play_sound(SND_COIN)
                 return STATE_STAGE1
-
-        # Gradient
-        for y in range(0, HEIGHT, 3):
-            shade = int(140 + (y / HEIGHT) * 60)
-            pygame.draw.line(SCREEN, (shade, 20, 90), (0, y), (WIDTH, y))
-
-        # Floating hearts
-        for p in particles:
-            p['y'] += p['speed']
-            if p['y'] > HEIGHT:
-                p['y'] = 0
-                p['x'] = random.randint(0, WIDTH)
-            draw_heart(SCREEN, (p['x'], int(p['y'])), PINK_LIGHT, p['size'])
-
-        # Title
-        title_text = "Will You Be Frankenstien?"
-        title = FONT_BIG.render(title_text, True, WHITE)
-        SCREEN.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 120))
-        sub = FONT_MED.render("ðŸŽ® Mario x Valentine Horror ðŸ’•", True, MARIO_RED)
-        SCREEN.blit(sub, sub.get_rect(center=(WIDTH//2, HEIGHT//2 - 50)))
-        controls = FONT_SMALL.render("Arrow Keys/WASD: Move | SPACE/UP: Jump", True, WHITE)
-        SCREEN.blit(controls, controls.get_rect(center=(WIDTH//2, HEIGHT - 60)))
-        start_button.draw(SCREEN)
-        pygame.display.flip()
-
-async def stage1_scene():
+            PROFILER.lap("events")
+
+            for _ in range(sim.advance(frame_ms / 1000)):
+                hearts.update(sim.dt)
+                hearts.wrap(HEIGHT, 0, WIDTH)
+            PROFILER.lap("update")
+
+            # Gradient, every third row of whatever resolution the frame renders at
+            target = render_surface()
+            width, height = target.get_size()
+            for y in range(0, height, 3):
+                shade = int(140 + (y / height) * 60)
+                target.fill((shade, 20, 90), (0, y, width, 1))
+
+            # Floating hearts
+            hearts.draw(SCREEN, round(hearts.count * QUALITY.particle_share))
+
+            # Title
+            title_text = "Will You Be Frankenstien?"
+            title = render_text(FONT_BIG, title_text, True, WHITE)
+            SCREEN.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 120))
+            sub = render_text(FONT_MED, "ðŸŽ® Mario x Valentine Horror ðŸ’•", True, MARIO_RED)
+            SCREEN.blit(sub, sub.get_rect(center=(WIDTH//2, HEIGHT//2 - 50)))
+            controls = render_text(FONT_SMALL, "Arrow Keys/WASD: Move | SPACE/UP: Jump", True, WHITE)
+            SCREEN.blit(controls, controls.get_rect(center=(WIDTH//2, HEIGHT - 60)))
+            start_button.draw(SCREEN)
+            DIRTY.invalidate()  # hearts drift across the whole screen
+            DIRTY.present()
+            run_idle()
+
+class Stage1Scene(Scene):
     """WEB SAFE: Collect body parts"""
-    girl = MarioGirl()
-    current_room = "Bedroom"
-
-    part_positions = {
-        "Bedroom": [(150, HEIGHT-160), (250, HEIGHT-200)],
-        "Living Room": [(500, HEIGHT-160), (650, HEIGHT-180)],
-        "Kitchen": [(350, HEIGHT-140), (550, HEIGHT-170)],
-    }
-
-    all_parts = []
-    for room, positions in part_positions.items():
-        for i, pos in enumerate(positions):
-            part_idx = list(part_positions.keys()).index(room) * 2 + i
-            if part_idx < len(PART_NAMES):
-                part = BodyPart(PART_NAMES[part_idx], pos)
-                part.room = room
-                all_parts.append(part)
-
-    collected_count = 0
-    total_parts = len(all_parts)
-
-    doors = {
-        "Bedroom": (WIDTH - 60, HEIGHT - 160),
-        "Living Room": (60, HEIGHT - 160),
-        "Kitchen": (WIDTH - 60, HEIGHT - 160),
-    }
-
-    running = True
-    while running:
-        await asyncio.sleep(0)  # WEB SAFE
-        CLOCK.tick(60)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
 
-        keys = pygame.key.get_pressed()
-        girl.handle_keys(keys)
-
-        # Collect parts
-        for part in all_parts:
-            if part.room == current_room and not part.collected:
-                part.update()
-                if girl.rect.colliderect(part.rect):
-                    part.collected = True
-                    collected_count += 1
-                    play_sound(SND_COIN)
-
-        # Door collision
-        if current_room in doors:
-            door_x, door_y = doors[current_room]
-            door_rect = pygame.Rect(door_x - 35, door_y - 80, 70, 100)
-            if girl.rect.colliderect(door_rect):
-                room_index = ROOMS.index(current_room)
-                next_room = ROOMS[(room_index + 1) % len(ROOMS)]
-                if next_room == "Lab" and collected_count < total_parts:
-                    next_room = ROOMS[0]
-                await room_transition_effect(current_room, next_room)
-                current_room = next_room
-                girl.x = WIDTH - 120 if current_room == "Living Room" else 100
-                girl.y = HEIGHT - 150
-
-        # Stage complete
-        if current_room == "Lab" and collected_count == total_parts:
-            play_sound(SND_STAGE_CLEAR)
-            await asyncio.sleep(1.0)  # WEB SAFE
-            return STATE_STAGE2
-
-        # Draw
-        draw_room_background(current_room)
-        if current_room in doors:
-            draw_door(*doors[current_room])
-        for part in all_parts:
-            if part.room == current_room:
-                part.draw(SCREEN)
-        girl.draw(SCREEN)
-
-        # HUD
-        hud_text = f"ðŸ“ {current_room} | ðŸ§© Parts: {collected_count}/{total_parts}"
-        hud_surf = FONT_SMALL.render(hud_text, True, WHITE)
-        SCREEN.blit(hud_surf, (30, 25))
-
-        if collected_count == total_parts:
-            msg = FONT_MED.render("âœ¨ All parts found! Enter the pipe to Lab! âœ¨", True, YELLOW)
-            SCREEN.blit(msg, msg.get_rect(center=(WIDTH//2, 80)))
-
-        pygame.display.flip()
-
-async def stage2_scene():
+    next_state = STATE_STAGE2
+
+    def build(self):
+        self.level = load_level("stage1")
+        self.goal_room = next(reversed(self.level.rooms))
+        self.camera = Camera()
+
+        # Parts and doors never move, so they go into the broadphase once
+        self.world = SpatialHash()
+        self.room_parts = {}
+        self.doors = {}
+        for room in self.level.rooms.values():
+            self.room_parts[room.name] = []
+            for name, pos in room.parts:
+                part = BodyPart(name, pos)
+                part.room = room.name
+                self.room_parts[room.name].append(part)
+            if room.door:
+                door = self.doors[room.name] = Door(room.name, *room.door)
+                self.world.insert(door, room.name, door.rect)
+        self.total_parts = sum(len(parts) for parts in self.room_parts.values())
+
+    def warm_tasks(self):
+        tasks = {"glow": bake_glow_sprites}
+        tasks.update((("part", part.name), lambda name=part.name: BodyPart.sprite(name))
+                     for parts in self.room_parts.values() for part in parts)
+        tasks.update(room_background_tasks(self.level.rooms[self.level.start_room].style))
+        # Warps to every room bake after everything else
+        tasks.update((("warp", room), lambda room=room: warp_clip(room, request_only=True))
+                     for room in self.level.rooms)
+        return tasks
+
+    def reset(self):
+        # Collected parts go back into the broadphase
+        for parts in self.room_parts.values():
+            for part in parts:
+                part.reset()
+                self.world.insert(part, part.room, part.rect)
+        self.girl = MarioGirl(*self.level.start_pos)
+
+    def enter_room(self, name):
+        self.girl.world_width = self.camera.world_width = self.level.rooms[name].width
+        self.camera.follow(self.girl.x + 16)
+
+    async def run(self):
+        level, goal_room, girl, camera = self.level, self.goal_room, self.girl, self.camera
+        world, room_parts, doors = self.world, self.room_parts, self.doors
+        current_room = level.start_room
+        collected_count = 0
+        total_parts = self.total_parts
+        self.enter_room(current_room)
+        self.queue_warm_tasks()  # cheap cache hits once prefetched; covers a cold start
+
+        sim = FixedStep()
+        running = True
+        while running:
+            frame_ms = await CLOCK.tick(RENDER_FPS)  # WEB SAFE
+            PROFILER.begin_frame("stage1")
+            INPUT.poll()
+            PROFILER.lap("events")
+
+            keys = INPUT.keys
+            for _ in range(sim.advance(frame_ms / 1000)):
+                girl.handle_keys(keys)
+
+                # Only parts near the camera animate
+                for entity in world.query(current_room, camera.view(margin=80)):
+                    if isinstance(entity, BodyPart):
+                        entity.update()
+                hits = world.query(current_room, girl.rect)
+
+                # Collect parts
+                for part in hits:
+                    if isinstance(part, BodyPart):
+                        part.collected = True
+                        world.remove(part)
+                        collected_count += 1
+                        play_sound(SND_COIN)
+                        DIRTY.invalidate()  # HUD and banner change
+
+                # Door collision
+                if current_room in doors and doors[current_room] in hits:
+                    next_room = level.next_room(current_room)
+                    if next_room == goal_room and collected_count < total_parts:
+                        next_room = level.start_room
+                    await room_transition_effect(current_room, next_room)
+                    current_room = next_room
+                    girl.place(*level.rooms[current_room].spawn)
+                    self.enter_room(current_room)
+                    sim.resync()
+                    DIRTY.invalidate()
+                    break
+
+                # Stage complete
+                if current_room == goal_room and collected_count == total_parts:
+                    play_sound(SND_STAGE_CLEAR)
+                    await asyncio.sleep(1.0)  # WEB SAFE
+                    return STATE_STAGE2
+            PROFILER.lap("update")
+
+            # Draw only what the camera sees; a scrolled view repaints everything
+            girl_x, _ = girl.position(sim.alpha)
+            last_camera_x = camera.x
+            camera.follow(girl_x + 16)
+            if camera.x != last_camera_x:
+                DIRTY.invalidate()
+            draw_room_background(level.rooms[current_room].style, camera.x)
+            visible = world.query(current_room, camera.view(margin=80))
+            if current_room in doors and doors[current_room] in visible:
+                doors[current_room].draw(camera.x)
+            for entity in visible:
+                if isinstance(entity, BodyPart):
+                    entity.draw(SCREEN, camera.x)
+            girl.draw(SCREEN, sim.alpha, camera.x)
+            if current_room == goal_room:
+                draw_lab_lighting(SCREEN, pygame.time.get_ticks() / 1000)
+
+            # HUD
+            hud_text = f"ðŸ“ {current_room} | ðŸ§© Parts: {collected_count}/{total_parts}"
+            hud_surf = render_text(FONT_SMALL, hud_text, True, WHITE)
+            SCREEN.blit(hud_surf, (30, 25))
+
+            if collected_count == total_parts:
+                msg = render_text(FONT_MED, f"âœ¨ All parts found! Enter the pipe to {goal_room}! âœ¨", True, YELLOW)
+                SCREEN.blit(msg, msg.get_rect(center=(WIDTH//2, 80)))
+
+            DIRTY.present()
+            run_idle()
+
+class Stage2Scene(Scene):
     """WEB SAFE: Assembly stage"""
-    slots = []
-    positions = {
-        "Legs": (WIDTH//2, HEIGHT//2 + 80),
-        "Torso": (WIDTH//2, HEIGHT//2 + 20),
-        "Hands": (WIDTH//2, HEIGHT//2 - 40),
-        "Head": (WIDTH//2, HEIGHT//2 - 100),
-        "Brain": (WIDTH//2 + 100, HEIGHT//2 - 100),
-        "Heart": (WIDTH//2 - 100, HEIGHT//2 + 20)
-    }
-
-    for name in ASSEMBLY_ORDER:
-        slots.append(AssemblySlot(name, positions[name]))
-
-    next_index = 0
-    running = True
-
-    while running:
-        await asyncio.sleep(0)  # WEB SAFE
-        CLOCK.tick(60)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+
+    next_state = STATE_STAGE3
+    input_events = (pygame.MOUSEBUTTONDOWN,)
+
+    def build(self):
+        self.slots = [AssemblySlot(name, ASSEMBLY_POSITIONS[name]) for name in ASSEMBLY_ORDER]
+
+    def warm_tasks(self):
+        tasks = room_background_tasks("lab")
+        tasks.update((("slot", name), lambda name=name: AssemblySlot.filled_sprite(name))
+                     for name in ASSEMBLY_ORDER)
+        tasks.update((("pulse", slot.name), lambda slot=slot: slot.pulse_clip(request_only=True))
+                     for slot in self.slots)
+        tasks.update(lab_lighting_tasks())
+        return tasks
+
+    def reset(self):
+        for slot in self.slots:
+            slot.reset()
+
+    async def run(self):
+        slots = self.slots
+        next_index = 0
+        sim = FixedStep()
+        running = True
+
+        while running:
+            frame_ms = await CLOCK.tick(RENDER_FPS)  # WEB SAFE
+            PROFILER.begin_frame("stage2")
+            INPUT.poll()
+            for _ in INPUT.clicks:
                 if next_index < len(slots):
                     slots[next_index].filled = True
                     next_index += 1
                     play_sound(SND_POWERUP)
+                    DIRTY.invalidate()  # tip text changes
+            PROFILER.lap("events")
+
+            for _ in range(sim.advance(frame_ms / 1000)):
+                for s in slots:
+                    s.update()
+            PROFILER.lap("update")
+
+            draw_room_background("lab")
+            for s in slots:
+                s.draw(SCREEN)
+            draw_lab_lighting(SCREEN, pygame.time.get_ticks() / 1000)
+
+            title = render_text(FONT_BIG, "âš¡ Stage 2: Assembly âš¡", True, YELLOW)
+            SCREEN.blit(title, title.get_rect(center=(WIDTH//2, 60)))
+
+            if next_index < len(ASSEMBLY_ORDER):
+                tip = f"ðŸ–±ï¸ Click to place: {ASSEMBLY_ORDER[next_index]}"
+                tip_surf = render_text(FONT_SMALL, tip, True, WHITE)
+                SCREEN.blit(tip_surf, (35, HEIGHT - 45))
+
+            if next_index == len(slots):
+                done_msg = render_text(FONT_BIG, "ðŸ’€ Ready for Life! ðŸ’€", True, GREEN_ZOMBIE)
+                SCREEN.blit(done_msg, done_msg.get_rect(center=(WIDTH//2, HEIGHT - 60)))
+                DIRTY.invalidate()
+                DIRTY.present()
+                play_sound(SND_STAGE_CLEAR)
+                await asyncio.sleep(2.5)  # WEB SAFE
+                return STATE_STAGE3
+
+            DIRTY.present()
+            run_idle()
+
+class Stage3Scene(Scene):
+    """WEB SAFE: Choose awakening method"""
 
-        draw_room_background("Lab")
-        title = FONT_BIG.render("âš¡ Stage 2: Assembly âš¡", True, YELLOW)
-        SCREEN.blit(title, title.get_rect(center=(WIDTH//2, 60)))
+    next_state = STATE_ENDING
+    input_events = (pygame.MOUSEBUTTONDOWN,)
 
-        for s in slots:
-            s.update()
-            s.draw(SCREEN)
+    def build(self):
+        self.lightning_btn = Button((WIDTH//2 - 300, HEIGHT//2 + 80, 240, 90), "âš¡ Lightning", YELLOW, ORANGE)
+        self.kiss_btn = Button((WIDTH//2 + 60, HEIGHT//2 + 80, 240, 90), "ðŸ’‹ Kiss", PINK, PINK_LIGHT)
 
-        if next_index < len(ASSEMBLY_ORDER):
-            tip = f"ðŸ–±ï¸ Click to place: {ASSEMBLY_ORDER[next_index]}"
-            tip_surf = FONT_SMALL.render(tip, True, WHITE)
-            SCREEN.blit(tip_surf, (35, HEIGHT - 45))
+    def buttons(self):
+        return (self.lightning_btn, self.kiss_btn)
 
-        if next_index == len(slots):
-            done_msg = FONT_BIG.render("ðŸ’€ Ready for Life! ðŸ’€", True, GREEN_ZOMBIE)
-            SCREEN.blit(done_msg, done_msg.get_rect(center=(WIDTH//2, HEIGHT - 60)))
-            pygame.display.flip()
-            play_sound(SND_STAGE_CLEAR)
-            await asyncio.sleep(2.5)  # WEB SAFE
-            return STATE_STAGE3
+    def reset(self):
+        self.lightning_btn.drawn_hover = self.kiss_btn.drawn_hover = None
 
-        pygame.display.flip()
+    async def run(self):
+        lightning_btn, kiss_btn = self.lightning_btn, self.kiss_btn
+        choice = None
+        pacer = FramePacer()
+        running = True
 
-async def stage3_scene():
-    """WEB SAFE: Choose awakening method"""
-    lightning_btn = Button((WIDTH//2 - 300, HEIGHT//2 + 80, 240, 90), "âš¡ Lightning", YELLOW, ORANGE)
-    kiss_btn = Button((WIDTH//2 + 60, HEIGHT//2 + 80, 240, 90), "ðŸ’‹ Kiss", PINK, PINK_LIGHT)
-    pulse = 0
-    choice = None
-    running = True
+        while running:
+            frame_ms = await CLOCK.tick(pacer.fps)  # WEB SAFE
+            PROFILER.begin_frame("stage3")
 
-    while running:
-        await asyncio.sleep(0)  # WEB SAFE
-        CLOCK.tick(60)
-        pulse += 0.08
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if lightning_btn.is_clicked(event):
+            INPUT.poll()
+            if INPUT.clicked(lightning_btn):
                 play_sound(SND_LIGHTNING)
                 choice = "LIGHTNING"
                 running = False
-            if kiss_btn.is_clicked(event):
+            if INPUT.clicked(kiss_btn):
                 play_sound(SND_KISS)
                 choice = "KISS"
                 running = False
-
-        SCREEN.fill(BLACK)
-        title = FONT_BIG.render("âš¡ Stage 3: Awakening ðŸ’•", True, WHITE)
-        SCREEN.blit(title, title.get_rect(center=(WIDTH//2, 70)))
-        q = FONT_MED.render("Choose your method...", True, PINK_LIGHT)
-        SCREEN.blit(q, q.get_rect(center=(WIDTH//2, HEIGHT//2 - 20)))
-        lightning_btn.draw(SCREEN)
-        kiss_btn.draw(SCREEN)
-        pygame.display.flip()
-
-    return STATE_ENDING, choice
-
-async def ending_scene(choice):
-    """WEB SAFE: Ending cutscene"""
-    timer = 0
-    duration = 7000
-    hugging = choice == "KISS"
-    particles = []
-
-    while timer < duration:
-        await asyncio.sleep(0)  # WEB SAFE
-        dt = CLOCK.tick(60)
-        timer += dt
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+            PROFILER.lap("events")
+
+            hover = lightning_btn.hover_changed() or kiss_btn.hover_changed()
+            if not pacer.frame(frame_ms, DIRTY.full or hover):
+                run_idle(pacer.idle_budget_ms)
+                continue
+            if DIRTY.redraw_all():
+                SCREEN.fill(BLACK)
+                title = render_text(FONT_BIG, "âš¡ Stage 3: Awakening ðŸ’•", True, WHITE)
+                SCREEN.blit(title, title.get_rect(center=(WIDTH//2, 70)))
+                q = render_text(FONT_MED, "Choose your method...", True, PINK_LIGHT)
+                SCREEN.blit(q, q.get_rect(center=(WIDTH//2, HEIGHT//2 - 20)))
+                lightning_btn.draw(SCREEN)
+                kiss_btn.draw(SCREEN)
+            else:
+                for btn in (lightning_btn, kiss_btn):
+                    if btn.hover_changed():
+                        btn.draw(SCREEN)
+            DIRTY.present()
+            run_idle()
+
+        return STATE_ENDING, choice
+
+# KISS ending: ~24 hearts per second (0.4 per frame at 60 fps), never more than the capacity alive
+ENDING_HEART_RATE = 24.0
+ENDING_HEART_CAPACITY = 2048
+
+LIGHTNING_PALETTE = clip_palette([BLACK], [(BLACK, YELLOW), (BLACK, WHITE)])
+
+def paint_lightning_card(surf, index):
+    msg1 = clip_text(FONT_BIG, "âš¡ Lightning Strike! âš¡", YELLOW, BLACK)
+    surf.blit(msg1, msg1.get_rect(center=(WIDTH//2, 90)))
+    msg2 = clip_text(FONT_MED, "The spark fades... ðŸ’”", WHITE, BLACK)
+    surf.blit(msg2, msg2.get_rect(center=(WIDTH//2, 150)))
+    return surf.get_rect()
+
+def lightning_clip(request_only=False):
+    bake = CLIPS.request if request_only else CLIPS.clip
+    return bake(("lightning",), 1, paint_lightning_card, LIGHTNING_PALETTE)
+
+LIGHTNING_STRIKES = (0.0, 0.2, 1.4, 1.55, 3.0)  # seconds into the ending
+LIGHTNING_FLASH_S = 0.3
+
+def lightning_flash(t):
+    """Flash amount (0-1) t seconds into the lightning ending; exactly 0 between strikes"""
+    amount = 0.0
+    for strike in LIGHTNING_STRIKES:
+        if 0 <= t - strike < LIGHTNING_FLASH_S:
+            amount = max(amount, (1 - (t - strike) / LIGHTNING_FLASH_S) ** 2)
+    return amount
+
+def lightning_due(t, within):
+    """Whether a strike starts within the next `within` seconds after t"""
+    return any(0 < strike - t <= within for strike in LIGHTNING_STRIKES)
+
+def spawn_ending_heart(hearts):
+    hearts.spawn(random.randint(0, WIDTH), HEIGHT,
+                 random.uniform(-60, 60), -random.uniform(120, 300), random.randint(*ENDING_HEART_SIZES))
+
+class EndingScene(Scene):
+    """WEB SAFE: Ending cutscene, then the play again menu"""
+
+    next_state = STATE_STAGE1
+    input_events = (pygame.MOUSEBUTTONDOWN,)
+
+    def build(self):
+        self.hearts = ParticleSystem(ENDING_HEART_CAPACITY, PINK, ENDING_HEART_RATE, spawn_ending_heart)
+        self.play_again_btn = Button((WIDTH//2 - 310, HEIGHT//2 + 50, 280, 90), "ðŸ”„ Play Again")
+        self.quit_btn = Button((WIDTH//2 + 30, HEIGHT//2 + 50, 280, 90), "ðŸšª Quit", GREY, (90, 90, 100))
+
+    def warm_tasks(self):
+        return {"lightning": lambda: lightning_clip(request_only=True),
+                ("mask", "scanlines"): lambda: effect_mask("scanlines", render_surface().get_size(), SCANLINE_DARKNESS)}
+
+    def enter(self, choice):
+        self.choice = choice
+        super().enter()
+
+    def buttons(self):
+        return (self.play_again_btn, self.quit_btn)
+
+    def reset(self):
+        self.hearts.clear()
+        self.play_again_btn.drawn_hover = self.quit_btn.drawn_hover = None
+
+    async def run(self):
+        timer = 0
+        duration = 7000
+        hugging = self.choice == "KISS"
+        hearts = self.hearts
+        sim = FixedStep()
+        pacer = FramePacer()
+        drawn_flash = None
+
+        while timer < duration:
+            dt = await CLOCK.tick(RENDER_FPS if hugging else pacer.fps)  # WEB SAFE
+            timer += dt
+            PROFILER.begin_frame("ending")
+            INPUT.poll()
+            PROFILER.lap("events")
+
+            hearts.rate = ENDING_HEART_RATE * QUALITY.particle_share
+            for _ in range(sim.advance(dt / 1000)):
+                if hugging:
+                    hearts.emit(sim.dt)
+                    hearts.update(sim.dt)
+                    hearts.cull(-50, math.inf)
+            PROFILER.lap("update")
+
+            if hugging:
+                SCREEN.fill(BLACK)
+                hearts.draw(SCREEN)
+
+                msg1 = render_text(FONT_BIG, "ðŸ’‹ True Love's Kiss! ðŸ§Ÿ", True, PINK_LIGHT)
+                SCREEN.blit(msg1, msg1.get_rect(center=(WIDTH//2, 90)))
+                msg2 = render_text(FONT_BIG, "ðŸ’• Happy Creepy Valentine! ðŸ’•", True, MARIO_RED)
+                SCREEN.blit(msg2, msg2.get_rect(center=(WIDTH//2, HEIGHT - 80)))
+                DIRTY.invalidate()  # hearts rise across the whole screen
+            else:
+                # The card only changes while a strike is flashing; wake from
+                # idle ticks one idle period early so a strike is not drawn late
+                flash = lightning_flash(timer / 1000)
+                if not pacer.frame(dt, flash != drawn_flash or DIRTY.full,
+                                   active=lightning_due(timer / 1000, 1 / IDLE_FPS)):
+                    run_idle(pacer.idle_budget_ms)
+                    continue
+                drawn_flash = flash
+                lightning_clip().blit(SCREEN, 0)
+                apply_flash(SCREEN, flash)
+                apply_scanlines(SCREEN)
+                DIRTY.invalidate()
+
+            DIRTY.present()
+            run_idle()
+
+        DIRTY.invalidate()
+        return await self.menu()
+
+    async def menu(self):
+        """WEB SAFE: Play again menu"""
+        play_again_btn, quit_btn = self.play_again_btn, self.quit_btn
+        pacer = FramePacer()
+
+        while True:
+            frame_ms = await CLOCK.tick(pacer.fps)  # WEB SAFE
+            PROFILER.begin_frame("ending_menu")
+            INPUT.poll()
+            if INPUT.clicked(play_again_btn):
+                play_sound(SND_COIN)
+                return STATE_STAGE1
+            if INPUT.clicked(quit_btn):
                 pygame.quit()
                 sys.exit()
+            PROFILER.lap("events")
+
+            hover = play_again_btn.hover_changed() or quit_btn.hover_changed()
+            if not pacer.frame(frame_ms, DIRTY.full or hover):
+                run_idle(pacer.idle_budget_ms)
+                continue
+            if DIRTY.redraw_all():
+                SCREEN.fill(DARK_GREY)
+                msg = render_text(FONT_BIG, "Experiment Complete", True, GREEN_ZOMBIE)
+                SCREEN.blit(msg, msg.get_rect(center=(WIDTH//2, HEIGHT//2 - 100)))
+                play_again_btn.draw(SCREEN)
+                quit_btn.draw(SCREEN)
+            else:
+                for btn in (play_again_btn, quit_btn):
+                    if btn.hover_changed():
+                        btn.draw(SCREEN)
+            DIRTY.present()
+            run_idle()
+
+SCENES = {
+    STATE_TITLE: TitleScene(),
+    STATE_STAGE1: Stage1Scene(),
+    STATE_STAGE2: Stage2Scene(),
+    STATE_STAGE3: Stage3Scene(),
+    STATE_ENDING: EndingScene(),
+}
+
+# ------------------------- ATLAS -------------------------
+def atlas_entries():
+    """{key: surface} of every static visual, freshly painted, for tools/bake_atlas.py"""
+    clear_sprite_cache()
+    bake_glow_sprites()
+    for facing_right in (False, True):
+        for stride in (False, True):
+            MarioGirl.sprite(facing_right, stride)
+    for name in PART_NAMES:
+        BodyPart.sprite(name)
+        AssemblySlot.filled_sprite(name)
+    for size in range(TITLE_HEART_SIZES[0], TITLE_HEART_SIZES[1] + 1):
+        heart_sprite(PINK_LIGHT, size)
+    for size in range(ENDING_HEART_SIZES[0], ENDING_HEART_SIZES[1] + 1):
+        heart_sprite(PINK, size)
+    door_sprite()
+    for scene in SCENES.values():
+        scene.ensure_built()
+        for button in scene.buttons():
+            button.frame(button.base_color)
+            button.frame(button.hover_color)
+    entries = dict(_sprites)
+
+    widths = dict.fromkeys(ROOM_STYLES, WIDTH)  # Stage 2 draws the lab style
+    for room in load_level("stage1").rooms.values():
+        widths[room.style] = max(widths[room.style], room.width)
+    size = (CHUNK_WIDTH, HEIGHT)
+    for style, width in widths.items():
+        for index in range((width - 1) // CHUNK_WIDTH + 1):
+            key = background_key(style, index * CHUNK_WIDTH, size)
+            if key not in entries:
+                entries[key] = pygame.Surface(size, pygame.SRCALPHA)
+                paint_room_background(entries[key], style, index * CHUNK_WIDTH)
+    return entries
+
+# One-call entry points, kept for tools/replay.py
+async def title_scene():
+    return await SCENES[STATE_TITLE].play()
 
-        SCREEN.fill(BLACK)
-
-        if hugging:
-            if random.random() < 0.4:
-                particles.append({
-                    'x': random.randint(0, WIDTH),
-                    'y': HEIGHT,
-                    'vy': -random.uniform(2, 5),
-                    'vx': random.uniform(-1, 1),
-                    'size': random.randint(10, 20)
-                })
-            for p in particles:
-                p['y'] += p['vy']
-                p['x'] += p['vx']
-                draw_heart(SCREEN, (int(p['x']), int(p['y'])), PINK, p['size'])
-            particles = [p for p in particles if p['y'] > -50]
-
-            msg1 = FONT_BIG.render("ðŸ’‹ True Love's Kiss! ðŸ§Ÿ", True, PINK_LIGHT)
-            SCREEN.blit(msg1, msg1.get_rect(center=(WIDTH//2, 90)))
-            msg2 = FONT_BIG.render("ðŸ’• Happy Creepy Valentine! ðŸ’•", True, MARIO_RED)
-            SCREEN.blit(msg2, msg2.get_rect(center=(WIDTH//2, HEIGHT - 80)))
-        else:
-            msg1 = FONT_BIG.render("âš¡ Lightning Strike! âš¡", True, YELLOW)
-            SCREEN.blit(msg1, msg1.get_rect(center=(WIDTH//2, 90)))
-            msg2 = FONT_MED.render("The spark fades... ðŸ’”", True, WHITE)
-            SCREEN.blit(msg2, msg2.get_rect(center=(WIDTH//2, 150)))
-
-        pygame.display.flip()
+async def stage1_scene():
+    return await SCENES[STATE_STAGE1].play()
 
-    return await ending_menu()
+async def stage2_scene():
+    return await SCENES[STATE_STAGE2].play()
 
-async def ending_menu():
-    """WEB SAFE: Play again menu"""
-    play_again_btn = Button((WIDTH//2 - 310, HEIGHT//2 + 50, 280, 90), "ðŸ”„ Play Again")
-    quit_btn = Button((WIDTH//2 + 30, HEIGHT//2 + 50, 280, 90), "ðŸšª Quit", GREY, (90, 90, 100))
+async def stage3_scene():
+    return await SCENES[STATE_STAGE3].play()
 
-    while True:
-        await asyncio.sleep(0)  # WEB SAFE
-        CLOCK.tick(60)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if play_again_btn.is_clicked(event):
-                play_sound(SND_COIN)
-                return STATE_STAGE1
-            if quit_btn.is_clicked(event):
-                pygame.quit()
-                sys.exit()
+async def ending_scene(choice):
+    return await SCENES[STATE_ENDING].play(choice)
 
-        SCREEN.fill(DARK_GREY)
-        msg = FONT_BIG.render("Experiment Complete", True, GREEN_ZOMBIE)
-        SCREEN.blit(msg, msg.get_rect(center=(WIDTH//2, HEIGHT//2 - 100)))
-        play_again_btn.draw(SCREEN)
-        quit_btn.draw(SCREEN)
-        pygame.display.flip()
+startup_step("module setup")
 
 # ------------------------- MAIN -------------------------
 async def main():
     """WEB SAFE: Main game loop with click-to-start"""
+    # Sounds stream in and the title warms up while the click-to-start screen is up
+    ASSETS.start()
+    SCENES[STATE_TITLE].prefetch()
+
     # BROWSER AUDIO POLICY: Click-to-start screen
-    SCREEN.fill(BLACK)
-    title = FONT_BIG.render("Click to Start", True, WHITE)
-    SCREEN.blit(title, title.get_rect(center=(WIDTH//2, HEIGHT//2 - 50)))
-    subtitle = FONT_SMALL.render("(Click anywhere or press any key)", True, PINK)
-    SCREEN.blit(subtitle, subtitle.get_rect(center=(WIDTH//2, HEIGHT//2 + 20)))
-    pygame.display.flip()
-
-    # Wait for user interaction
+    title = render_text(FONT_BIG, "Click to Start", True, WHITE)
+    subtitle = render_text(FONT_SMALL, "(Click anywhere or press any key)", True, PINK)
+    bar = pygame.Rect(0, 0, 320, 14)
+    bar.center = (WIDTH//2, HEIGHT//2 + 80)
+    first_frame = True
+    INPUT.configure((pygame.MOUSEBUTTONDOWN,))
+
+    # Wait for user interaction; only the loading bar moves, so once the
+    # sounds are in the screen idles until a click or key
+    pacer = FramePacer()
+    frame_ms = 0
+    drawn_fill = None
+    DIRTY.invalidate()
     waiting = True
     while waiting:
-        await asyncio.sleep(0)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+        fill_w = None if ASSETS.done else max(14, int(bar.w * ASSETS.progress))
+        if pacer.frame(frame_ms, DIRTY.full or fill_w != drawn_fill, active=not ASSETS.done):
+            drawn_fill = fill_w
+            SCREEN.fill(BLACK)
+            SCREEN.blit(title, title.get_rect(center=(WIDTH//2, HEIGHT//2 - 50)))
+            SCREEN.blit(subtitle, subtitle.get_rect(center=(WIDTH//2, HEIGHT//2 + 20)))
+            if fill_w is not None:
+                fill_rounded(SCREEN, GREY, bar, 7)
+                fill = bar.copy()
+                fill.w = fill_w
+                fill_rounded(SCREEN, PINK, fill, 7)
+            DIRTY.invalidate()
+            DIRTY.present()
+        if first_frame:
+            first_frame = False
+            startup_step("first frame")
+            print(startup_report())
+        run_idle(pacer.idle_budget_ms)
+
+        frame_ms = await CLOCK.tick(pacer.fps)  # WEB SAFE
+        for event in INPUT.poll():
             if event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.KEYDOWN:
                 waiting = False
                 break
 
+    await ASSETS.wait(MUSIC_THEME)
     start_music()
     state = STATE_TITLE
     choice = None
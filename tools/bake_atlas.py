@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Build-time sprite atlas: every static visual packed into one PNG
+
+Usage: python tools/bake_atlas.py [--width 512] [--out assets/atlas.png]
+
+Paints what main.atlas_entries() lists (body parts and their glows, filled
+assembly slots, hearts, the girl, the pipe door, button frames and the
+background strips) procedurally, packs them onto shelves of one transparent
+sheet and writes it next to a JSON index:
+    {"version": 1, "source": sha256 of main.py, "screen": [w, h],
+     "size": [w, h], "rects": {repr(key): [x, y, w, h]}}
+At runtime main.py loads the sheet once and blits subsurfaces; a missing or
+stale atlas (main.py edited since the bake) falls back to painting.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame  # noqa: E402
+import main  # noqa: E402
+
+
+def pack_shelves(sizes, width):
+    """Place (w, h) boxes on shelves, tallest first; returns ([(x, y)], sheet height)"""
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    positions = [None] * len(sizes)
+    x = y = shelf_h = 0
+    for i in order:
+        w, h = sizes[i]
+        if w > width:
+            raise ValueError(f"a {w} px wide sprite does not fit a {width} px sheet")
+        if x + w > width:
+            x, y, shelf_h = 0, y + shelf_h, 0
+        positions[i] = (x, y)
+        x += w
+        shelf_h = max(shelf_h, h)
+    return positions, y + shelf_h
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Bake the static sprites into one texture atlas")
+    parser.add_argument("--width", type=int, default=512, help="sheet width in pixels")
+    parser.add_argument("--out", default=os.path.join(ROOT, main.ATLAS_PATH))
+    parser.add_argument("--index", help="JSON index path (default: --out with .json)")
+    args = parser.parse_args()
+    index_path = args.index or os.path.splitext(args.out)[0] + ".json"
+
+    started = time.perf_counter()
+    main.ATLAS.rects = {}  # paint everything, even when an atlas already exists
+    entries = list(main.atlas_entries().items())
+    sizes = [surf.get_size() for _, surf in entries]
+    positions, height = pack_shelves(sizes, args.width)
+
+    sheet = pygame.Surface((args.width, height), pygame.SRCALPHA)
+    sheet.fill((0, 0, 0, 0))
+    rects = {}
+    for (key, surf), pos in zip(entries, positions):
+        # MAX onto transparent black copies RGBA exactly; a normal blit would blend
+        sheet.blit(surf, pos, special_flags=pygame.BLEND_RGBA_MAX)
+        rects[repr(key)] = [*pos, *surf.get_size()]
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    pygame.image.save(sheet, args.out)
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump({"version": main.SpriteAtlas.VERSION, "source": main.source_stamp(),
+                   "screen": [main.WIDTH, main.HEIGHT], "size": [args.width, height],
+                   "rects": rects}, f)
+        f.write("\n")
+
+    used = sum(w * h for w, h in sizes)
+    print(f"{len(entries)} sprites -> {args.out} ({args.width}x{height}, "
+          f"{used / (args.width * height):.0%} used, {os.path.getsize(args.out) / 1024:.0f} KiB) "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main_cli()
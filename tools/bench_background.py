@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Frame-time comparison: per-line room background vs cached background chunks
+
+Usage: python tools/bench_background.py [--frames N]
+Runs headless (SDL dummy video/audio drivers).
+"""
+
+import os
+import sys
+import time
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import main  # noqa: E402
+
+
+def time_frames(draw, frames):
+    samples = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        draw()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return sum(samples) / len(samples), samples[len(samples) // 2]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'style':<12} {'per-line ms':>12} {'cached ms':>10} {'speedup':>8}")
+    for style in main.ROOM_STYLES:
+        main.clear_background_cache()
+        main.draw_room_background(style)  # warm the cache outside the timing
+        line_mean, _ = time_frames(lambda: main.paint_room_background(main.SCREEN, style), args.frames)
+        cached_mean, _ = time_frames(lambda: main.draw_room_background(style), args.frames)
+        print(f"{style:<12} {line_mean:>12.3f} {cached_mean:>10.3f} {line_mean / cached_mean:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Per-frame cost of the full-screen effects at the game's resolution
+
+Usage: python tools/bench_effects.py [--frames N] [--budget-ms 2.0]
+Runs headless (SDL dummy video/audio drivers).
+
+Each effect is applied to a freshly drawn Lab frame, so every pass works on
+real pixels; the redraw itself is timed separately and subtracted. Masks are
+baked before timing (their one-off cost is listed first). The last row is
+the same multiply done in NumPy over a pixels2d view of the frame, for
+comparison with the blend-blit path the game uses.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame  # noqa: E402
+import main  # noqa: E402
+
+
+def numpy_multiply(surf, factor, scratch):
+    """Reference: scale every channel by factor/256 on packed 32-bit pixels"""
+    np = main.np
+    lo, hi = scratch
+    px = pygame.surfarray.pixels2d(surf)
+    np.bitwise_and(px, 0x00FF00FF, out=lo)
+    np.multiply(lo, factor, out=lo)
+    np.right_shift(lo, 8, out=lo)
+    np.bitwise_and(lo, 0x00FF00FF, out=lo)
+    np.right_shift(px, 8, out=hi)
+    np.bitwise_and(hi, 0x00FF00FF, out=hi)
+    np.multiply(hi, factor, out=hi)
+    np.bitwise_and(hi, 0xFF00FF00, out=hi)
+    np.bitwise_or(lo, hi, out=px)
+
+
+def time_effect(effect, frames):
+    """Mean ms of draw + effect minus mean ms of the draw alone"""
+    def run(apply):
+        start = time.perf_counter()
+        for i in range(frames):
+            main.draw_room_background("lab")
+            if apply:
+                effect(main.SCREEN, i)
+        return (time.perf_counter() - start) / frames * 1000
+    run(True)  # warm caches
+    return max(0.0, run(True) - run(False))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--budget-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    np = main.load_numpy()
+    if np is None:
+        sys.exit("NumPy is required for the masked effects")
+    size = main.SCREEN.get_size()
+
+    print(f"{size[0]}x{size[1]}, {args.frames} frames, budget {args.budget_ms:.1f} ms")
+    for kind, params in (("vignette", (main.LAB_VIGNETTE,)), ("gradient", main.LAB_LAMP),
+                         ("scanlines", (main.SCANLINE_DARKNESS,))):
+        start = time.perf_counter()
+        main.effect_mask(kind, size, *params)
+        print(f"  bake {kind:<10} {(time.perf_counter() - start) * 1000:8.3f} ms (once)")
+
+    scratch = (np.empty(size, np.uint32), np.empty(size, np.uint32))
+    factor = np.full(size, 200, np.uint32)
+    effects = [
+        ("lamp light", lambda surf, i: main.apply_lamp_light(surf, i / 60)),
+        ("vignette", lambda surf, i: main.apply_vignette(surf)),
+        ("flash", lambda surf, i: main.apply_flash(surf, 0.5)),
+        ("scanlines", lambda surf, i: main.apply_scanlines(surf)),
+        ("lab lighting", lambda surf, i: main.draw_lab_lighting(surf, i / 60)),
+        ("numpy multiply", lambda surf, i: numpy_multiply(surf, factor, scratch)),
+    ]
+    over = []
+    for name, effect in effects:
+        ms = time_effect(effect, args.frames)
+        reference = name == "numpy multiply"
+        verdict = "reference" if reference else ("ok" if ms <= args.budget_ms else "OVER")
+        if verdict == "OVER":
+            over.append(name)
+        print(f"  {name:<15} {ms:8.3f} ms  {verdict}")
+    if over:
+        sys.exit(f"over budget: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main_cli()
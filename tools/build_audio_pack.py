@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Build-time audio bundle: downmix + resample every WAV into one indexed pack
+
+Usage: python tools/build_audio_pack.py [--rate 16000] [--src assets/sfx] [--out assets/audio.pack]
+
+Every clip is converted to mono signed 16-bit PCM at --rate, which becomes
+the mixer format at runtime, so main.py can hand each entry straight to
+pygame.mixer.Sound(buffer=...) from a memory-mapped view of the pack.
+
+Layout (little-endian):
+    b"FRPK"  u32 version  u32 header_len  header (UTF-8 JSON)  padding  PCM data
+    header = {"rate": int, "channels": 1, "width": 2,
+              "entries": {name: {"offset": int, "length": int}}}
+Offsets are absolute and 16-byte aligned.
+"""
+
+import os
+import sys
+import json
+import time
+import wave
+import struct
+import argparse
+from array import array
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PACK_MAGIC = b"FRPK"
+PACK_VERSION = 1
+ALIGN = 16
+
+
+def read_mono16(path):
+    """Return (samples, rate) as a mono signed 16-bit array"""
+    with wave.open(path, "rb") as w:
+        channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        raw = w.readframes(w.getnframes())
+    if width == 1:
+        samples = array("h", ((b - 128) << 8 for b in raw))
+    elif width == 2:
+        samples = array("h")
+        samples.frombytes(raw)
+    else:
+        raise ValueError(f"{path}: unsupported sample width {width}")
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if channels > 1:
+        samples = array("h", (sum(samples[i:i + channels]) // channels
+                              for i in range(0, len(samples), channels)))
+    return samples, rate
+
+
+def resample(samples, src_rate, dst_rate):
+    """Linear-interpolation resampler; good enough for chiptune effects"""
+    if src_rate == dst_rate or not samples:
+        return samples
+    count = max(1, int(len(samples) * dst_rate / src_rate))
+    step = src_rate / dst_rate
+    last = len(samples) - 1
+    out = array("h", bytes(2 * count))
+    for i in range(count):
+        pos = i * step
+        j = int(pos)
+        frac = pos - j
+        a = samples[j]
+        b = samples[j + 1] if j < last else a
+        out[i] = int(a + (b - a) * frac)
+    return out
+
+
+def build(src, out, rate):
+    names = sorted(f for f in os.listdir(src) if f.lower().endswith(".wav"))
+    blobs = {}
+    for filename in names:
+        samples, src_rate = read_mono16(os.path.join(src, filename))
+        pcm = resample(samples, src_rate, rate)
+        if sys.byteorder == "big":
+            pcm.byteswap()
+        blobs[os.path.splitext(filename)[0]] = pcm.tobytes()
+
+    # Header size depends on the offsets it contains; settle on a fixed point
+    entries = {name: {"offset": 0, "length": len(blob)} for name, blob in blobs.items()}
+    data_start = 0
+    while True:
+        offset = data_start
+        for name, blob in blobs.items():
+            entries[name]["offset"] = offset
+            offset += -(-len(blob) // ALIGN) * ALIGN
+        header = json.dumps({"rate": rate, "channels": 1, "width": 2, "entries": entries},
+                            separators=(",", ":")).encode("utf-8")
+        needed = -(-(12 + len(header)) // ALIGN) * ALIGN
+        if needed == data_start:
+            break
+        data_start = needed
+
+    with open(out, "wb") as f:
+        f.write(PACK_MAGIC + struct.pack("<II", PACK_VERSION, len(header)) + header)
+        f.write(b"\0" * (data_start - f.tell()))
+        for name, blob in blobs.items():
+            f.write(blob)
+            f.write(b"\0" * (-len(blob) % ALIGN))
+    return names
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Pack assets/sfx/*.wav into one mono PCM bundle")
+    parser.add_argument("--src", default=os.path.join(ROOT, "assets", "sfx"))
+    parser.add_argument("--out", default=os.path.join(ROOT, "assets", "audio.pack"))
+    parser.add_argument("--rate", type=int, default=16000, help="output sample rate (also the mixer rate)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    names = build(args.src, args.out, args.rate)
+    loose = sum(os.path.getsize(os.path.join(args.src, n)) for n in names)
+    packed = os.path.getsize(args.out)
+    print(f"{len(names)} clips: {loose / 1024:.1f} KB loose -> {packed / 1024:.1f} KB packed "
+          f"({args.rate} Hz mono s16) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Parallel headless frame exporter for share clips and golden frames
+
+Usage:
+    python tools/export_frames.py                          # every job into frames/
+    python tools/export_frames.py pipe ending-kiss --workers 4
+    python tools/export_frames.py title --frames 90 --out golden
+    python tools/export_frames.py --check --out golden     # compare against a saved manifest
+
+Scenes run under SDL's dummy drivers with a seeded `random` and the replay
+harness's simulated clock (tools/replay.py), so a frame's pixels depend only
+on the job, the seed and the frame index. Each job is cut into contiguous
+frame ranges that a ProcessPoolExecutor renders in parallel: a worker plays
+the scene from the start, skips saving frames before its range and stops at
+the end of it. Skipped frames only cost the draw (about 1 ms); PNG encoding
+dominates, so throughput scales with the worker count. Idle-time prefetch
+is switched off in the workers (its wall-clock budget would make the
+random stream depend on machine speed).
+
+Every job writes <out>/<job>/frame_NNNNN.png plus manifest.json holding the
+SHA-256 of each frame's raw RGB pixels (independent of the PNG encoder).
+--check renders without writing PNGs and exits 1 when any checksum differs
+from the manifest already in <out>.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# replay sets up the dummy drivers and the import path for main
+from replay import ROOT, ReplayClock, ScriptedKeys, VirtualAsyncio  # noqa: E402
+import pygame  # noqa: E402
+import main  # noqa: E402
+
+# name -> (scene coroutine factory, default frame count)
+JOBS = {
+    "title": (lambda: main.title_scene(), 180),
+    "pipe": (lambda: main.room_transition_effect("Bedroom", "Living Room"), main.WARP_FRAMES),
+    "ending-kiss": (lambda: main.ending_scene("KISS"), 480),
+    "ending-lightning": (lambda: main.ending_scene("LIGHTNING"), 480),
+}
+
+
+class ExportDone(Exception):
+    pass
+
+
+def frame_digest(surf):
+    return hashlib.sha256(pygame.image.tobytes(surf, "RGB")).hexdigest()
+
+
+def render_range(job, start, stop, seed, sim_fps, out_dir):
+    """Worker: play job from frame 0, keep frames [start, stop); returns {index: sha256}"""
+    main.QUALITY.pin(0)
+    main.CLIPS.clear()
+    # Idle prefetch runs on a wall-clock budget and may draw from random;
+    # without it everything bakes on first use and frames stay reproducible
+    main.run_idle = lambda ms=0: None
+    main.IDLE_FRAMES = False  # one picture per frame, even where the game would skip static ones
+    # Start from a fresh black window; the title gradient only repaints every third row
+    main.SCREEN.fill((0, 0, 0))
+    clock = ReplayClock([], 1000 / sim_fps, stop + 1)
+    main.CLOCK, main.asyncio = clock, VirtualAsyncio()
+    pygame.key.get_pressed = lambda: ScriptedKeys(clock.held)
+    pygame.mouse.get_pos = lambda: clock.cursor
+    pygame.time.get_ticks = lambda: int(clock.sim_time)
+    pygame.event.clear()
+    random.seed(seed)
+
+    digests = {}
+    present = main.DIRTY.present
+
+    def capture():
+        present()
+        index = capture.frame
+        capture.frame += 1
+        if index >= start:
+            digests[index] = frame_digest(main.SCREEN)
+            if out_dir:
+                pygame.image.save(main.SCREEN, os.path.join(out_dir, f"frame_{index:05d}.png"))
+        if capture.frame >= stop:
+            raise ExportDone
+    capture.frame = 0
+
+    main.DIRTY.present = capture
+    try:
+        asyncio.run(JOBS[job][0]())
+    except ExportDone:
+        pass
+    finally:
+        del main.DIRTY.present
+    return digests
+
+
+def split(frames, parts):
+    """Contiguous [start, stop) ranges, as even as possible"""
+    parts = max(1, min(parts, frames))
+    bounds = [frames * i // parts for i in range(parts + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Render scenes headless into PNG sequences with checksums")
+    parser.add_argument("jobs", nargs="*", help=f"any of {', '.join(JOBS)} (default: all)")
+    parser.add_argument("--out", default=os.path.join(ROOT, "frames"))
+    parser.add_argument("--frames", type=int, help="frames per job (default: per-job length)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunks", type=int, help="frame ranges per job (default: --workers)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--sim-fps", type=float, default=60.0)
+    parser.add_argument("--check", action="store_true", help="verify against <out>/<job>/manifest.json")
+    args = parser.parse_args()
+    jobs = args.jobs or list(JOBS)
+    unknown = [job for job in jobs if job not in JOBS]
+    if unknown:
+        parser.error(f"unknown job {unknown[0]!r} (choose from {', '.join(JOBS)})")
+
+    tasks = []
+    for job in jobs:
+        frames = args.frames or JOBS[job][1]
+        job_dir = os.path.join(args.out, job)
+        if not args.check:
+            os.makedirs(job_dir, exist_ok=True)
+        for start, stop in split(frames, args.chunks or args.workers):
+            tasks.append((job, start, stop, None if args.check else job_dir))
+
+    started = time.perf_counter()
+    digests = {job: {} for job in jobs}
+    # Spawned, not forked: fonts opened before a fork break in the children
+    with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [(job, pool.submit(render_range, job, start, stop, args.seed, args.sim_fps, job_dir))
+                   for job, start, stop, job_dir in tasks]
+        for job, future in futures:
+            digests[job].update(future.result())
+    elapsed = time.perf_counter() - started
+
+    mismatched = 0
+    for job in jobs:
+        manifest_path = os.path.join(args.out, job, "manifest.json")
+        frames = {f"{i:05d}": digest for i, digest in sorted(digests[job].items())}
+        if args.check:
+            with open(manifest_path, encoding="utf-8") as f:
+                expected = json.load(f)["sha256"]
+            bad = sorted(i for i in frames.keys() | expected.keys() if frames.get(i) != expected.get(i))
+            mismatched += len(bad)
+            print(f"{job}: {len(bad)} of {len(frames)} frames differ" + (f" (first {bad[0]})" if bad else ""))
+        else:
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump({"job": job, "seed": args.seed, "sim_fps": args.sim_fps,
+                           "size": list(main.SCREEN.get_size()), "sha256": frames}, f, indent=1)
+                f.write("\n")
+
+    total = sum(len(d) for d in digests.values())
+    print(f"{total} frames, {len(tasks)} ranges on {args.workers} workers in {elapsed:.2f} s "
+          f"({total / elapsed:.1f} frames/s)")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the hot draw primitives, with stored JSON baselines
+
+Usage:
+    python tools/microbench.py                     # run, compare against the baseline if there is one
+    python tools/microbench.py --save              # run and store the results as the new baseline
+    python tools/microbench.py -k door -k heart    # only cases whose name contains "door" or "heart"
+    python tools/microbench.py --threshold 0.15 --case-threshold draw_heart=0.3
+Runs headless (SDL dummy video/audio drivers) at quality level 0.
+
+Each case is warmed up (this also bakes the sprites, chunks and clips it
+uses), then timed in --repeats batches. A batch's call count is calibrated so
+it lasts at least --min-batch-ms, and the garbage collector is off while it
+runs. Per-call times of the batches are summarised as min/median/mean/stdev
+in microseconds.
+
+A case regresses when its median exceeds the baseline median by more than
+its threshold (default 10%); any regression makes the exit status 1.
+Baselines are machine-specific, so keep them local (the default path is
+git-ignored).
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame  # noqa: E402
+import main  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "microbench_baseline.json")
+
+# name -> setup() returning the timed callable fn(i), i being the call index
+CASES = {}
+
+
+def case(name):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+@case("draw_heart")
+def _draw_heart():
+    return lambda i: main.draw_heart(main.SCREEN, (500, 300), main.PINK, 20)
+
+
+@case("MarioGirl.draw")
+def _girl_draw():
+    girl = main.MarioGirl()
+
+    def draw(i):
+        girl.walk_frame = i % 20
+        girl.facing_right = i % 40 < 20
+        girl.draw(main.SCREEN, 0.5, 0)
+    return draw
+
+
+@case("BodyPart.draw")
+def _part_draw():
+    part = main.BodyPart("Heart", (400, 300))
+
+    def draw(i):
+        part.sparkle_timer = i
+        part.float_offset = (i % 20) - 10
+        part.draw(main.SCREEN, 0)
+    return draw
+
+
+@case("AssemblySlot.draw empty")
+def _slot_empty():
+    slot = main.AssemblySlot("Torso", main.ASSEMBLY_POSITIONS["Torso"])
+
+    def draw(i):
+        slot.pulse = i * 0.1
+        slot.draw(main.SCREEN)
+    return draw
+
+
+@case("AssemblySlot.draw filled")
+def _slot_filled():
+    slot = main.AssemblySlot("Torso", main.ASSEMBLY_POSITIONS["Torso"])
+    slot.filled = True
+    return lambda i: slot.draw(main.SCREEN)
+
+
+@case("Button.draw")
+def _button_draw():
+    button = main.Button((main.WIDTH // 2 - 140, main.HEIGHT // 2 + 80, 280, 80), "Start Game")
+
+    def draw(i):
+        main.INPUT.cursor = button.rect.center if i % 2 else (0, 0)
+        button.draw(main.SCREEN)
+    return draw
+
+
+@case("draw_room_background Bedroom")
+def _background_bedroom():
+    return lambda i: main.draw_room_background("sky", 0)
+
+
+@case("draw_room_background Lab")
+def _background_lab():
+    return lambda i: main.draw_room_background("lab", 0)
+
+
+@case("draw_door")
+def _door():
+    return lambda i: main.draw_door(900, main.HEIGHT - 100)
+
+
+@case("room_transition_effect frame")
+def _transition_frame():
+    clip = main.warp_clip("Living Room")
+    return lambda i: main.DIRTY.add(clip.blit(main.SCREEN, i % main.WARP_FRAMES))
+
+
+def calibrate(fn, min_batch_s):
+    """Calls per batch so one batch lasts at least min_batch_s"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for i in range(number):
+            fn(i)
+        if time.perf_counter() - start >= min_batch_s:
+            return number
+        number *= 2
+
+
+def measure(fn, warmup, repeats, min_batch_s):
+    for i in range(warmup):
+        fn(i)
+    number = calibrate(fn, min_batch_s)
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for i in range(number):
+                fn(i)
+            samples.append((time.perf_counter() - start) / number * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "calls": number * repeats,
+        "min_us": round(min(samples), 3),
+        "median_us": round(statistics.median(samples), 3),
+        "mean_us": round(statistics.fmean(samples), 3),
+        "stdev_us": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "sdl": ".".join(map(str, pygame.get_sdl_version())),
+        "machine": platform.machine(),
+        "video_driver": os.environ["SDL_VIDEODRIVER"],
+        "numpy": main.load_numpy() is not None,
+        "retained": main.RETAINED_RENDERING,
+    }
+
+
+def compare(name, result, baseline, threshold):
+    """Return (change string, verdict) against the baseline median"""
+    old = baseline.get(name)
+    if old is None:
+        return "", "new"
+    ratio = result["median_us"] / old["median_us"] if old["median_us"] else 1.0
+    change = f"{(ratio - 1) * 100:+.1f}%"
+    if ratio > 1 + threshold:
+        return change, "REGRESSED"
+    if ratio < 1 - threshold:
+        return change, "faster"
+    return change, "ok"
+
+
+def parse_thresholds(pairs, parser):
+    thresholds = {}
+    for pair in pairs:
+        name, sep, value = pair.rpartition("=")
+        if not sep or name not in CASES:
+            parser.error(f"--case-threshold expects CASE=FRACTION with a known case, got {pair!r}")
+        thresholds[name] = float(value)
+    return thresholds
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-k", dest="patterns", action="append", default=[],
+                        help="only run cases whose name contains this text (repeatable)")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    parser.add_argument("--warmup", type=int, default=50, help="untimed calls before measuring")
+    parser.add_argument("--repeats", type=int, default=15, help="timed batches per case")
+    parser.add_argument("--min-batch-ms", type=float, default=20.0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed median slowdown as a fraction (default 0.10)")
+    parser.add_argument("--case-threshold", action="append", default=[], metavar="CASE=FRACTION",
+                        help="per-case override of --threshold (repeatable)")
+    parser.add_argument("--json", help="also write this run's results here")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(CASES))
+        return
+    thresholds = parse_thresholds(args.case_threshold, parser)
+    names = [name for name in CASES if not args.patterns or any(p in name for p in args.patterns)]
+    if not names:
+        parser.error("no case matches -k")
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline, encoding="utf-8") as f:
+            stored = json.load(f)
+        baseline = stored["cases"]
+        if stored.get("environment") != environment():
+            print(f"note: baseline was recorded in a different environment: {stored.get('environment')}")
+
+    main.QUALITY.pin(0)
+    results = {}
+    regressions = []
+    print(f"{'case':<32} {'median us':>10} {'stdev':>8} {'min':>9} {'baseline':>10} {'change':>8}  verdict")
+    for name in names:
+        fn = CASES[name]()
+        result = results[name] = measure(fn, args.warmup, args.repeats, args.min_batch_ms / 1000)
+        change, verdict = compare(name, result, baseline, thresholds.get(name, args.threshold))
+        if verdict == "REGRESSED":
+            regressions.append(name)
+        old = baseline.get(name, {}).get("median_us")
+        print(f"{name:<32} {result['median_us']:>10.2f} {result['stdev_us']:>8.2f} {result['min_us']:>9.2f} "
+              f"{old if old is not None else '-':>10} {change:>8}  {verdict if baseline else ''}")
+
+    report = {"environment": environment(), "cases": results}
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if regressions:
+        sys.exit(f"regressed beyond threshold: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Headless scripted-input replay harness with per-scene frame benchmarks
+
+Runs main.py's async scenes under SDL's dummy video/audio drivers, feeds
+each one an input timeline, seeds `random`, replaces CLOCK with an uncapped
+clock that reports a fixed simulated frame time, and prints per-scene
+frame statistics as JSON.
+
+Usage:
+    python tools/replay.py                      # full playthrough, built-in timelines
+    python tools/replay.py --scenes title stage1 --seed 7
+    python tools/replay.py --timeline my_run.json --out report.json
+    python tools/replay.py --trace-allocs       # adds surface churn and tracemalloc peaks (slower)
+
+"audio" counts the scene's effect triggers by outcome (played, coalesced
+into a voice within its cooldown, stolen from another voice, dropped).
+"blocks_retained" is how many more memory blocks are held after the scene
+than before it (caches filling up, leaks); memory allocated and released
+within a frame does not show there. --trace-allocs adds "surfaces_created",
+every Surface the scene made (pygame.Surface() plus the Surface and Font
+methods and transform/surfarray functions that return a new one) in total
+and per frame, which is where per-frame allocation churn shows up, and the
+tracemalloc peak. Both hooks slow the frames down. At half render scale
+the per-frame upscale into the window (transform.scale with a destination,
+which allocates nothing) counts as one Surface per frame too.
+"enter_ms" is the time from entering a scene to its first frame tick, i.e.
+the setup spike a player sees on a scene change. Scenes may be listed more
+than once (--scenes title stage1 stage2 stage3 ending stage1); repeats are
+reported under the name with a "+" per repeat.
+
+Timeline files map scene names to entries, applied on the scene's Nth frame:
+    {"stage1": [{"frame": 0, "keys": ["LEFT", "SPACE"]},
+                {"frame": 110, "keys": ["RIGHT", "SPACE"]}],
+     "stage3": [{"frame": 20, "click": [680, 450]}]}
+"keys" replaces the set of held keys (pygame K_* names), "mouse" moves the
+cursor and "click" moves it and presses the left button there.
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import asyncio
+import argparse
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame  # noqa: E402
+import main  # noqa: E402
+
+SCENES = ["title", "stage1", "stage2", "stage3", "ending"]
+
+# Built-in playthrough. Stage1 sweeps each room while hopping so every part
+# and every pipe is touched: Bedroom left then right, Living Room left,
+# Kitchen right (walking under the low part, then hopping) into the Lab.
+CENTER_X = main.WIDTH // 2
+BUILTIN_TIMELINES = {
+    "title": [{"frame": 60, "click": [CENTER_X, main.HEIGHT // 2 + 120]}],
+    "stage1": [
+        {"frame": 0, "keys": ["LEFT", "SPACE"]},
+        {"frame": 110, "keys": ["RIGHT", "SPACE"]},
+        {"frame": 320, "keys": ["LEFT", "SPACE"]},
+        {"frame": 540, "keys": ["RIGHT"]},
+        {"frame": 640, "keys": ["RIGHT", "SPACE"]},
+    ],
+    "stage2": [{"frame": 10 * (i + 1), "click": [CENTER_X, main.HEIGHT // 2]} for i in range(6)],
+    "stage3": [{"frame": 20, "mouse": [320, 450]}, {"frame": 40, "click": [680, 450]}],
+    "ending": [{"frame": 460, "mouse": [680, 420]}, {"frame": 480, "click": [330, 420]}],
+}
+
+
+class ScriptedKeys:
+    """Stands in for the pygame.key.get_pressed() snapshot"""
+
+    def __init__(self, held):
+        self.held = held
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+class ReplayAborted(Exception):
+    pass
+
+
+class ReplayClock:
+    """Replaces main.CLOCK: never waits (only yields), always reports sim_ms, drives the input timeline"""
+
+    def __init__(self, timeline, sim_ms, max_frames):
+        self.timeline = sorted(timeline, key=lambda e: e["frame"])
+        self.sim_ms = sim_ms
+        self.max_frames = max_frames
+        self.frame = -1
+        self.sim_time = 0
+        self.held = set()
+        self.cursor = (0, 0)
+        self.samples = []
+        self.started = None
+        self.enter_ms = None
+        self._last = None
+        self._next = 0
+
+    async def tick(self, framerate=0):
+        await asyncio.sleep(0)
+        now = time.perf_counter()
+        if self._last is not None:
+            self.samples.append((now - self._last) * 1000)
+        elif self.started is not None:
+            self.enter_ms = (now - self.started) * 1000
+        self._last = now
+        self.frame += 1
+        self.sim_time += self.sim_ms
+        if self.frame > self.max_frames:
+            raise ReplayAborted(f"no scene exit after {self.max_frames} frames")
+        while self._next < len(self.timeline) and self.timeline[self._next]["frame"] <= self.frame:
+            self.apply(self.timeline[self._next])
+            self._next += 1
+        return self.sim_ms
+
+    def apply(self, entry):
+        if "keys" in entry:
+            self.held = {getattr(pygame, "K_" + name) for name in entry["keys"]}
+        if "mouse" in entry:
+            self.cursor = tuple(entry["mouse"])
+        if "click" in entry:
+            self.cursor = tuple(entry["click"])
+            for kind in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+                pygame.event.post(pygame.event.Event(kind, button=1, pos=self.cursor))
+
+    def get_fps(self):
+        return 1000 / self.sim_ms
+
+    def get_rawtime(self):
+        """Real duration of the last frame (nothing sleeps, so it is all work)"""
+        return self.samples[-1] if self.samples else 0
+
+
+# Calls returning a new Surface when made on a Surface, a Font or these modules
+SURFACE_FACTORIES = {"copy", "convert", "convert_alpha", "subsurface", "render", "scale", "smoothscale",
+                     "scale_by", "smoothscale_by", "rotate", "rotozoom", "flip", "make_surface"}
+
+
+class SurfaceCounter:
+    """Counts Surfaces created while active: pygame.Surface() calls through a
+    counting subclass, the factory calls above through a profile hook"""
+
+    def __init__(self):
+        self.created = 0
+        self._surface = None
+
+    def __enter__(self):
+        counter = self
+        self._surface = surface = pygame.Surface
+
+        class CountedSurface(surface):
+            def __init__(self, *args, **kwargs):
+                counter.created += 1
+                super().__init__(*args, **kwargs)
+
+        pygame.Surface = CountedSurface
+        sys.setprofile(self._profile)
+        return self
+
+    def __exit__(self, *exc):
+        sys.setprofile(None)
+        pygame.Surface = self._surface
+        return False
+
+    def _profile(self, frame, event, arg):
+        if event == "c_call" and arg.__name__ in SURFACE_FACTORIES:
+            owner = getattr(arg, "__self__", None)
+            if isinstance(owner, (self._surface, pygame.font.Font)) or owner in (pygame.transform,
+                                                                                   pygame.surfarray):
+                self.created += 1
+
+
+class VirtualAsyncio:
+    """main.asyncio stand-in: cutscene holds (sleep > 0) just yield once"""
+
+    def __getattr__(self, name):
+        return getattr(asyncio, name)
+
+    @staticmethod
+    async def sleep(delay, result=None):
+        await asyncio.sleep(0)
+        return result
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, round(pct / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def summarize(clock, wall, blocks, peak, surfaces):
+    samples = sorted(clock.samples)
+    frames = len(samples)
+    report = {
+        "frames": frames,
+        "fps": round(frames / wall, 1) if wall else 0.0,
+        "frame_ms": {
+            "mean": round(sum(samples) / frames, 3) if frames else 0.0,
+            "p50": round(percentile(samples, 50), 3),
+            "p95": round(percentile(samples, 95), 3),
+            "p99": round(percentile(samples, 99), 3),
+            "max": round(samples[-1], 3) if frames else 0.0,
+        },
+        "enter_ms": round(clock.enter_ms, 3) if clock.enter_ms is not None else None,
+        "blocks_retained": blocks,
+    }
+    if surfaces is not None:
+        report["surfaces_created"] = {"total": surfaces,
+                                      "per_frame": round(surfaces / frames, 2) if frames else 0.0}
+    if peak is not None:
+        report["tracemalloc_peak_kb"] = round(peak / 1024, 1)
+    return report
+
+
+async def run_scene(name, choice):
+    if name == "title":
+        return await main.title_scene()
+    if name == "stage1":
+        return await main.stage1_scene()
+    if name == "stage2":
+        return await main.stage2_scene()
+    if name == "stage3":
+        state, choice = await main.stage3_scene()
+        return [state, choice]
+    return await main.ending_scene(choice)
+
+
+def replay(scenes, timelines, args):
+    real_get_pressed = pygame.key.get_pressed
+    real_get_pos = pygame.mouse.get_pos
+    real_get_ticks = pygame.time.get_ticks
+    real_clock, real_asyncio = main.CLOCK, main.asyncio
+    real_quality = (main.QUALITY.level, main.QUALITY.pinned)
+    main.asyncio = VirtualAsyncio()
+    asyncio.run(main.ASSETS.load_all())  # sounds are loaded behind the click-to-start screen in the game
+    main.QUALITY.pin(None if args.quality == "auto" else int(args.quality))
+    random.seed(args.seed)
+
+    results = {}
+    choice = args.choice
+    try:
+        for name in scenes:
+            clock = ReplayClock(timelines.get(name, []), 1000 / args.sim_fps, args.max_frames)
+            main.CLOCK = clock
+            pygame.key.get_pressed = lambda: ScriptedKeys(clock.held)
+            pygame.mouse.get_pos = lambda: clock.cursor
+            pygame.time.get_ticks = lambda: int(clock.sim_time)
+            pygame.event.clear()
+
+            gc.collect()
+            counter = SurfaceCounter()
+            if args.trace_allocs:
+                tracemalloc.start()
+                counter.__enter__()
+            audio = main.AUDIO.stats()
+            blocks = sys.getallocatedblocks()
+            start = clock.started = time.perf_counter()
+            error = None
+            try:
+                outcome = asyncio.run(run_scene(name, choice))
+            except ReplayAborted as exc:
+                outcome, error = None, str(exc)
+            wall = time.perf_counter() - start
+            blocks = sys.getallocatedblocks() - blocks
+            peak = surfaces = None
+            if args.trace_allocs:
+                counter.__exit__()
+                surfaces = counter.created
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            key = name
+            while key in results:  # repeated scenes, e.g. a Play Again loop
+                key += "+"
+            results[key] = summarize(clock, wall, blocks, peak, surfaces)
+            results[key]["audio"] = {k: v - audio[k] for k, v in main.AUDIO.stats().items() if k != "busy"}
+            results[key]["result"] = outcome
+            if error:
+                results[key]["error"] = error
+            if name == "stage3" and outcome:
+                choice = outcome[1]
+    finally:
+        pygame.key.get_pressed = real_get_pressed
+        pygame.mouse.get_pos = real_get_pos
+        pygame.time.get_ticks = real_get_ticks
+        main.CLOCK, main.asyncio = real_clock, real_asyncio
+        main.QUALITY.pin(real_quality[0] if real_quality[1] else None)
+        main.QUALITY.set_level(real_quality[0])
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Headless scripted-input replay with frame benchmarks")
+    parser.add_argument("--scenes", nargs="+", choices=SCENES, default=SCENES)
+    parser.add_argument("--timeline", help="JSON file of per-scene input entries (overrides built-ins)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--choice", choices=["KISS", "LIGHTNING"], default="KISS",
+                        help="ending to play when stage3 is not part of the run")
+    parser.add_argument("--sim-fps", type=float, default=60.0, help="simulated frame rate reported to scenes")
+    parser.add_argument("--max-frames", type=int, default=5000)
+    parser.add_argument("--quality", choices=["auto", "0", "1", "2"], default="0",
+                        help="quality level to pin (default 0, full detail) or auto")
+    parser.add_argument("--trace-allocs", action="store_true",
+                        help="also report Surfaces created and tracemalloc peaks (slower)")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    timelines = dict(BUILTIN_TIMELINES)
+    if args.timeline:
+        with open(args.timeline, encoding="utf-8") as f:
+            timelines.update(json.load(f))
+
+    report = {
+        "seed": args.seed,
+        "sim_fps": args.sim_fps,
+        "video_driver": os.environ["SDL_VIDEODRIVER"],
+        "quality": args.quality,
+        "scenes": replay(args.scenes, timelines, args),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if any("error" in scene for scene in report["scenes"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()